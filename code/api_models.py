@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel
+
+# Response schema of GET /search: one entry per platform instead of parallel
+# per-platform dicts, snake_case product fields and no repeated keys
+
+Number = Union[int, float]
+
+# Response field -> catalog document field
+PRODUCT_FIELDS = {
+    "brand": "Brand",
+    "name": "Product Name",
+    "processor_type": "Processor Type",
+    "processor_series": "Processor Series",
+    "ram": "RAM",
+    "storage": "Storage",
+    "price": "Price",
+    "mrp": "MRP"
+}
+
+
+class Product(BaseModel):
+    brand: Optional[str] = None
+    name: Optional[str] = None
+    processor_type: Optional[str] = None
+    processor_series: Optional[str] = None
+    ram: Optional[str] = None
+    storage: Optional[str] = None
+    price: Optional[Number] = None
+    mrp: Optional[Number] = None
+
+
+class PriceSuggestion(BaseModel):
+    # price is None when no other platform lists the spec with a price
+    price: Optional[Number] = None
+    ref_platforms: List[str] = []
+    avg_price: Optional[Number] = None
+    brand_factor: Optional[Number] = None
+    platform_factor: Optional[Number] = None
+    final_factor: Optional[Number] = None
+    strategy: Optional[str] = None
+    # Price history statistics of the reference platforms, when recorded
+    market_trends: Optional[Dict[str, Dict[str, Optional[Number]]]] = None
+
+
+class PlatformResult(BaseModel):
+    available: bool
+    products: List[Product] = []
+    similar: List[Product] = []
+    # Only for platforms that do not list the spec
+    suggestion: Optional[PriceSuggestion] = None
+
+
+class Suggestion(BaseModel):
+    # One /genai_suggestions block; price as written, e.g. "57,000"
+    platform: str
+    price: str
+    reason: str
+
+
+class Spec(BaseModel):
+    brand: str
+    ram: str
+    storage: str
+    processor_series: str
+
+
+class GenAIHandle(BaseModel):
+    job_id: str
+    status: str
+    poll_url: str
+    stream_url: str
+
+
+class SearchResponse(BaseModel):
+    spec: Spec
+    found_in_db: bool
+    web_result_found: bool
+    missing_platforms: List[str]
+    platforms: Dict[str, PlatformResult]
+    genai: Optional[GenAIHandle] = None
+    # Local model suggestions for the platforms in need of one
+    local_suggestions: Optional[List[Suggestion]] = None
+
+
+def product_model(doc):
+    values = {}
+    for name, field in PRODUCT_FIELDS.items():
+        value = doc.get(field)
+        if value is not None and name not in ("price", "mrp"):
+            value = str(value).strip()
+        values[name] = value
+    return Product(**values)
+
+
+def search_response(spec, result, genai=None, local=None):
+    # Compact SearchResponse from a find_products() result
+    platforms = {}
+    for platform, matches in result["exact_matches"].items():
+        available = isinstance(matches, list) and bool(matches)
+        suggestion = None
+        if platform in result["business_opportunity"]:
+            price = result["business_opportunity"][platform]
+            breakdown = result["pricing_explanation"].get(platform, {})
+            suggestion = PriceSuggestion(
+                price=price if price != "No Data" else None,
+                **{key: breakdown[key] for key in ["ref_platforms", "avg_price", "brand_factor", "platform_factor", "final_factor", "strategy", "market_trends"] if key in breakdown}
+            )
+        platforms[platform] = PlatformResult(
+            available=available,
+            products=[product_model(doc) for doc in matches] if available else [],
+            similar=[product_model(doc) for doc in result["similar_products"].get(platform, [])],
+            suggestion=suggestion
+        )
+
+    return SearchResponse(
+        spec=Spec(**spec),
+        found_in_db=result["found_in_db"],
+        web_result_found=bool(result["web_result_found"]),
+        missing_platforms=result["missing_platforms"],
+        platforms=platforms,
+        genai=genai,
+        local_suggestions=[Suggestion(platform=entry["platform"], price=entry["price"], reason=entry["reason"]) for entry in local["structured"]] if local else None
+    )
@@ -1,15 +1,39 @@
-from fastapi import FastAPI, Query
-from pymongo import MongoClient
-from typing import Dict, List
-from genai_utils import get_llm_price_suggestion
-from web_utils import search_product_on_web
+import asyncio
+import csv
+import io
+import json
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from genai_utils import get_genai_cache_stats, get_llm_price_suggestion_async, parse_suggestions, stream_llm_price_suggestion, suggestion_cache
+from genai_jobs import start_genai_job, get_genai_job, cancel_genai_job, wait_genai_job, genai_job_result, follow_genai_job, suggestion_events
+from api_models import GenAIHandle, SearchResponse, search_response
+from web_utils import get_web_cache_stats, search_product_on_web, search_product_on_web_async, web_cache
+from pricing_engine import suggest_prices, explain_spec
+from pricing_factors import get_pricing_factors
+from data_access import collections
+from metrics import instrument, register_cache_stats, span
+from catalog_snapshot import load_products, snapshot_status
+from readiness import add_readiness, index_status
+from price_history import spec_trends
+import facet_index
+import opportunity_table
+import similarity_index
+import spec_index
+from opportunity_table import get_opportunity_table, refresh_opportunity_table, reprice_opportunity_table, watch_opportunity_table, top_opportunities, lookup_opportunity
+from facet_index import get_facet_index, refresh_facet_index, lookup_facets
+from spec_index import PRODUCT_PROJECTION, SPEC_LOOKUP, normalize_value, get_spec_index, refresh_spec_index, load_spec_candidates, lookup_exact, lookup_similar
+from similarity_index import get_similarity_index, lookup_nearest, lookup_equivalent
+from local_model import get_local_model, suggest_locally
+import local_model
 
 app = FastAPI()
+instrument(app, "backend2")
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")
-db = client["JSONS"]
-collections = ["reliance", "pai", "croma", "flipkart"]
+# Web validation and GenAI suggestion cache counters on /metrics
+register_cache_stats(lambda: {
+    **{("web", tier): stats for tier, stats in web_cache.stats().items() if stats is not None},
+    ("genai", "memory"): suggestion_cache.stats()
+})
 
 # Brand tiers
 brand_tiers = {
@@ -18,14 +42,6 @@ brand_tiers = {
     "mid": ["acer", "asus", "dell", "hp", "len"]
 }
 
-# Platform pricing adjustment
-platform_factors = {
-    "reliance": 1.00,
-    "pai": 0.97,
-    "croma": 1.03,
-    "flipkart": 0.95
-}
-
 def get_brand_tier(brand):
     brand = brand.lower()
     if brand in brand_tiers["premium"]:
@@ -35,104 +51,88 @@ def get_brand_tier(brand):
     else:
         return "mid"
 
-def find_products(brand, ram, storage, processor_series):
-    query = {
-        "Brand": {"$regex": f"^{brand.strip()}$", "$options": "i"},
-        "RAM": {"$regex": f"^{ram.strip()}$", "$options": "i"},
-        "Storage": {"$regex": f"^{storage.strip()}$", "$options": "i"},
-    }
-
-    if brand.lower() == "apple":
-        query["Processor Series"] = {"$regex": f"^{processor_series.strip()}$", "$options": "i"}
-    else:
-        query["$or"] = [
-            {"Processor Type": {"$regex": f"^{processor_series.strip()}$", "$options": "i"}},
-            {"Processor Series": {"$regex": f"^{processor_series.strip()}$", "$options": "i"}}
-        ]
-
+def match_spec(index, brand, ram, storage, processor_series, similarity=None):
     results = {}
-    similar_products = {}
     platform_prices = {}
-    avg_prices_by_platform = {}
-    price_breakdown = {}
     found_in_db = False
 
     for coll in collections:
-        exact_match = list(db[coll].find(query, {
-            "_id": 0, "Product Name": 1, "Processor Type": 1,
-            "Processor Series": 1, "Price": 1, "MRP": 1, "RAM": 1,
-            "Storage": 1, "Brand": 1
-        }))
+        with span("find_products.exact"):
+            exact_match = lookup_exact(index, coll, brand, ram, storage, processor_series)
 
         results[coll] = exact_match if exact_match else "Not Available"
 
         if exact_match:
             found_in_db = True
-            prices = [prod["Price"] for prod in exact_match if "Price" in prod]
-            platform_prices[coll] = prices
-            if prices:
-                avg_prices_by_platform[coll] = sum(prices) / len(prices)
-
-        all_products = list(db[coll].find({}, {
-            "_id": 0, "Brand": 1, "Product Name": 1, "Processor Type": 1,
-            "Processor Series": 1, "Price": 1, "MRP": 1, "RAM": 1, "Storage": 1
-        }))
-
-        for product in all_products:
-            product_ram = str(product.get("RAM", "")).strip().lower()
-            product_storage = str(product.get("Storage", "")).strip().lower()
-            product_processor = str(product.get("Processor Series", "")).strip().lower()
-            product_brand = str(product.get("Brand", "")).strip().lower()
-
-            if (
-                product_ram == ram.strip().lower() and
-                product_storage == storage.strip().lower() and
-                product_processor == processor_series.strip().lower() and
-                product_brand != brand.strip().lower()
-            ):
-                if coll not in similar_products:
-                    similar_products[coll] = []
-                similar_products[coll].append(product)
+            platform_prices[coll] = [prod["Price"] for prod in exact_match if "Price" in prod]
 
-    found_on_web = False
-    if not found_in_db:
-        query_text = f"{brand} {ram} {storage} {processor_series} laptop"
+    if not found_in_db and similarity is not None:
+        # The same configuration spelled differently ("1 TB" for "1024 GB")
+        # is still a catalog hit and saves the SerpAPI round trip
+        for coll in collections:
+            equivalent = lookup_equivalent(similarity, coll, brand, ram, storage, processor_series)
+            if equivalent:
+                found_in_db = True
+                results[coll] = equivalent
+                platform_prices[coll] = [prod["Price"] for prod in equivalent if "Price" in prod]
+
+    return results, platform_prices, found_in_db
+
+def get_missing_platforms(results):
+    return [
+        platform for platform in collections
+        if not isinstance(results.get(platform), list) or not results.get(platform)
+    ]
+
+# Platform and brand-tier pricing adjustments: fitted by calibrate_factors.py
+# and hot-loaded, with the hand-set values as defaults
+def get_platform_factors():
+    return get_pricing_factors()["platform_factors"]
+
+def get_brand_factor(brand):
+    return get_pricing_factors()["brand_factors"][get_brand_tier(brand)]
+
+async def current_opportunity_table():
+    # Repriced in place (no catalog read) when new factors have been loaded
+    platform_factors = get_platform_factors()
+    table = await get_opportunity_table(get_brand_factor, platform_factors)
+    if table["platform_factors"] is not platform_factors:
+        reprice_opportunity_table(table, platform_factors)
+    return table
+
+def web_query(brand, ram, storage, processor_series):
+    return f"{brand} {ram} {storage} {processor_series} laptop"
+
+def find_products(index, brand, ram, storage, processor_series, found_on_web=None, similarity=None):
+    # found_on_web may be looked up by the caller beforehand; otherwise
+    # SerpAPI is queried here (blocking) when the spec is not in the catalog.
+    # With a similarity index, similar products are the nearest neighbours
+    # in feature space rather than exact RAM/storage/processor string matches
+    results, platform_prices, found_in_db = match_spec(index, brand, ram, storage, processor_series, similarity)
+
+    similar_products = {}
+    with span("find_products.similar"):
+        prices = [price for values in platform_prices.values() for price in values]
+        price = sum(prices) / len(prices) if prices else None
+        for coll in collections:
+            if similarity is not None:
+                similar = lookup_nearest(similarity, coll, brand, ram, storage, processor_series, price)
+            else:
+                similar = lookup_similar(index, coll, brand, ram, storage, processor_series)
+            if similar:
+                similar_products[coll] = similar
+
+    if found_in_db:
+        found_on_web = False
+    elif found_on_web is None:
         found_on_web = search_product_on_web(
-            query_text, brand=brand, ram=ram, storage=storage, processor=processor_series
+            web_query(brand, ram, storage, processor_series), brand=brand, ram=ram, storage=storage, processor=processor_series
         )
 
-    tier = get_brand_tier(brand)
-    brand_factor = {
-        "premium": 1.05,
-        "mid": 1.00,
-        "budget": 0.95
-    }[tier]
-
-    suggested_prices = {}
-    for platform in collections:
-        if not isinstance(results.get(platform), list) or not results.get(platform):
-            ref_platforms = [p for p in avg_prices_by_platform if p != platform]
-            if ref_platforms:
-                avg_price = sum(avg_prices_by_platform[p] for p in ref_platforms) / len(ref_platforms)
-                platform_factor = platform_factors.get(platform, 1.00)
-                combined_factor = brand_factor * platform_factor
-                suggested = round(avg_price * combined_factor, 2)
-                suggested_prices[platform] = suggested
-                price_breakdown[platform] = {
-                    "ref_platforms": ref_platforms,
-                    "avg_price": round(avg_price, 2),
-                    "brand_factor": brand_factor,
-                    "platform_factor": platform_factor,
-                    "final_factor": round(combined_factor, 3),
-                    "suggested_price": suggested,
-                    "strategy": f"Average price from platforms {ref_platforms} × brand factor ({brand_factor}) × platform factor ({platform_factor})",
-                    "web_result_found": found_on_web or found_in_db
-                }
-            else:
-                suggested_prices[platform] = "No Data"
-                price_breakdown[platform] = {
-                    "web_result_found": found_on_web or found_in_db
-                }
+    with span("find_products.pricing"):
+        trends = spec_trends(brand, ram, storage, processor_series)
+        engine_result = suggest_prices([platform_prices], [get_brand_factor(brand)], collections, get_platform_factors(), [trends])
+        suggested_prices, price_breakdown = explain_spec(engine_result, 0, found_on_web or found_in_db, trends)
 
     return {
         "exact_matches": results,
@@ -141,95 +141,324 @@ def find_products(brand, ram, storage, processor_series):
         "business_opportunity": suggested_prices,
         "pricing_explanation": price_breakdown,
         "platform_prices_full": {k: v[0] if isinstance(v, list) and v else "Missing" for k, v in results.items() if k in collections},
-        "missing_platforms": [
-            platform for platform in collections
-            if not isinstance(results.get(platform), list) or not results.get(platform)
-        ],
+        "missing_platforms": get_missing_platforms(results),
         "web_result_found": found_on_web,
         "found_in_db": found_in_db
     }
 
+BATCH_SPEC_FIELDS = ["brand", "ram", "storage", "processor_series"]
+
+async def read_batch_specs(request):
+    content_type = request.headers.get("content-type", "").lower()
+    text = (await request.body()).decode("utf-8-sig")
+
+    if "csv" in content_type:
+        return list(csv.DictReader(io.StringIO(text)))
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    payload = json.loads(text) if text.strip() else []
+    if isinstance(payload, dict):
+        payload = payload.get("specs", [])
+    return payload
+
+def price_batch(index, specs, similarity=None):
+    rows = []
+    keys = {}
+    matched = []
+    trends = []
+
+    for spec in specs:
+        if not isinstance(spec, dict) or any(not str(spec.get(f) or "").strip() for f in BATCH_SPEC_FIELDS):
+            rows.append((spec, None))
+            continue
+
+        brand, ram, storage, processor_series = (str(spec[f]).strip() for f in BATCH_SPEC_FIELDS)
+        # Duplicate configurations in one batch are priced once
+        key = (normalize_value(brand), normalize_value(ram), normalize_value(storage), normalize_value(processor_series))
+        if key not in keys:
+            keys[key] = len(matched)
+            matched.append((brand, match_spec(index, brand, ram, storage, processor_series, similarity)))
+            trends.append(spec_trends(brand, ram, storage, processor_series))
+        rows.append((spec, keys[key]))
+
+    # One vectorised pass over every distinct spec in the batch
+    engine_result = suggest_prices(
+        [platform_prices for _, (_, platform_prices, _) in matched],
+        [get_brand_factor(brand) for brand, _ in matched],
+        collections, get_platform_factors(), trends
+    )
+
+    priced = {}
+    for spec, i in rows:
+        if i is None:
+            yield {"spec": spec, "error": f"Each spec needs {', '.join(BATCH_SPEC_FIELDS)}"}
+            continue
+        if i not in priced:
+            results, _, found_in_db = matched[i][1]
+            suggested_prices, price_breakdown = explain_spec(engine_result, i, found_in_db, trends[i])
+            priced[i] = {
+                "business_opportunity": suggested_prices,
+                "pricing_explanation": price_breakdown,
+                "missing_platforms": get_missing_platforms(results),
+                "found_in_db": found_in_db
+            }
+        yield {"spec": {f: spec[f] for f in BATCH_SPEC_FIELDS}, **priced[i]}
+
 @app.get("/get_filters")
 async def get_filters(brand: str = None, ram: str = None, storage: str = None):
-    query = {}
-    if brand:
-        query["Brand"] = {"$regex": f"^{brand.strip()}$", "$options": "i"}
-    if ram:
-        query["RAM"] = {"$regex": f"^{ram.strip()}$", "$options": "i"}
-    if storage:
-        query["Storage"] = {"$regex": f"^{storage.strip()}$", "$options": "i"}
-
-    pipeline = [
-        {"$match": query},
-        {"$group": {
-            "_id": None,
-            "brands": {"$addToSet": "$Brand"},
-            "rams": {"$addToSet": "$RAM"},
-            "storages": {"$addToSet": "$Storage"},
-            "processor_types": {"$addToSet": "$Processor Type"},
-            "processor_series": {"$addToSet": "$Processor Series"},
-        }}
-    ]
+    # Facets across every platform collection, answered from memory
+    index = await get_facet_index()
+    return lookup_facets(index, brand, ram, storage)
 
-    result = list(db.reliance.aggregate(pipeline))
-    data = {"brands": [], "rams": [], "storages": [], "processor_types": [], "processor_series": []}
-    if result:
-        data.update({
-            "brands": sorted(result[0].get("brands", [])),
-            "rams": sorted(result[0].get("rams", [])),
-            "storages": sorted(result[0].get("storages", [])),
-            "processor_types": sorted(result[0].get("processor_types", [])),
-            "processor_series": sorted(result[0].get("processor_series", [])),
-        })
-    return data
+async def run_opportunity_watch():
+    # Builds the table, retrying while Mongo (or the snapshot) is unavailable,
+    # then follows the catalog changes
+    while True:
+        try:
+            table = await current_opportunity_table()
+            break
+        except Exception as e:
+            print(f"❌ Opportunity table build failed ({e}), retrying in {opportunity_table.OPPORTUNITY_POLL_SECONDS}s")
+            await asyncio.sleep(opportunity_table.OPPORTUNITY_POLL_SECONDS)
+    await watch_opportunity_table(table)
+
+@app.on_event("startup")
+async def start_opportunity_watch():
+    # Keeps the opportunity table current as documents are inserted, deleted or repriced.
+    # In the background, so the app starts (from the snapshot) without Mongo
+    app.state.opportunity_watch = None
+    if opportunity_table.OPPORTUNITY_WATCH != "off":
+        app.state.opportunity_watch = asyncio.create_task(run_opportunity_watch())
+
+@app.on_event("shutdown")
+async def stop_opportunity_watch():
+    # Cancelling sets the change-stream thread's stop event as well
+    task = app.state.opportunity_watch
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        app.state.opportunity_watch = None
+
+WARMUP_SPECS = 50
+
+async def warm_up():
+    # Builds (or, under serve.py, inherits) the indexes and prices a sample of
+    # catalog specs so lazy imports, snapshot pages and caches are hot
+    index = await get_spec_index()
+    similarity = get_similarity_index(index, get_brand_tier)
+    get_local_model(similarity)
+    lookup_facets(await get_facet_index())
+    await current_opportunity_table()
+    keys = [key for coll in collections for key in index["exact"].get(coll, {})][:WARMUP_SPECS]
+    for brand, ram, storage, processor_series in keys:
+        find_products(index, brand, ram, storage, processor_series, found_on_web=False, similarity=similarity)
+
+def describe_indexes():
+    return {
+        "spec_index": index_status(spec_index._index),
+        "similarity_index": index_status(similarity_index._index),
+        "local_model": index_status(local_model._model),
+        "facet_index": index_status(facet_index._index),
+        "opportunity_table": index_status(opportunity_table._table),
+        "catalog_snapshot": snapshot_status()
+    }
+
+add_readiness(app, warm_up, describe_indexes)
+
+@app.post("/refresh_index")
+async def refresh_index():
+    # One catalog read rebuilds every in-memory index
+    products_by_coll = await load_products(PRODUCT_PROJECTION)
+    index = await refresh_spec_index(products_by_coll)
+    get_local_model(get_similarity_index(index, get_brand_tier))
+    # Synced first: the facet rebuild below already has whatever changes the sync forwards
+    await refresh_opportunity_table(get_brand_factor, get_platform_factors())
+    await current_opportunity_table()
+    await refresh_facet_index(products_by_coll)
+    return {"indexed_products": index["size"], "built_at": index["built_at"]}
+
+@app.get("/cache_stats")
+async def cache_stats():
+    # Hit/miss counters plus the upstream circuit breakers behind the caches
+    return {"web": get_web_cache_stats(), "genai": get_genai_cache_stats()}
+
+@app.get("/pricing_factors")
+async def pricing_factors():
+    # The factors suggestions are currently computed with, for UIs that explain them
+    return get_pricing_factors()
 
 @app.get("/search_products")
 async def search_products(brand: str = Query(...), ram: str = Query(...), storage: str = Query(...), processor_series: str = Query(...)):
-    return find_products(brand, ram, storage, processor_series)
+    similarity = None
+    with span("search_products.index"):
+        if SPEC_LOOKUP == "mongo":
+            index = await load_spec_candidates(brand, ram, storage, processor_series)
+        else:
+            index = await get_spec_index()
+            similarity = get_similarity_index(index, get_brand_tier)
+    found_on_web = False
+    if not any(
+        lookup_exact(index, coll, brand, ram, storage, processor_series)
+        or similarity is not None and lookup_equivalent(similarity, coll, brand, ram, storage, processor_series)
+        for coll in collections
+    ):
+        # Awaited here so a slow SerpAPI does not hold a worker thread
+        found_on_web = await search_product_on_web_async(
+            web_query(brand, ram, storage, processor_series), brand=brand, ram=ram, storage=storage, processor=processor_series
+        )
+    result = find_products(index, brand, ram, storage, processor_series, found_on_web, similarity)
+    with span("search_products.serialize"):
+        return JSONResponse(result)
+
+@app.post("/search_products/batch")
+async def search_products_batch(request: Request):
+    # Accepts a JSON list (or {"specs": [...]}), text/csv or application/x-ndjson body
+    try:
+        specs = await read_batch_specs(request)
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse batch: {e}")
+    if not isinstance(specs, list):
+        raise HTTPException(status_code=400, detail="Batch must be a list of specs")
+
+    index = await get_spec_index()
+    similarity = get_similarity_index(index, get_brand_tier)
+    lines = (json.dumps(row, ensure_ascii=False) + "\n" for row in price_batch(index, specs, similarity))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@app.get("/opportunities/top")
+async def opportunities_top(platform: str = Query(...), n: int = Query(10, ge=1, le=500)):
+    if platform not in collections:
+        raise HTTPException(status_code=404, detail=f"Unknown platform {platform}")
+    table = await current_opportunity_table()
+    return {"platform": platform, "opportunities": top_opportunities(table, platform, n)}
+
+@app.get("/opportunities")
+async def opportunities(brand: str = Query(...), ram: str = Query(...), storage: str = Query(...), processor_series: str = Query(...)):
+    table = await current_opportunity_table()
+    row = lookup_opportunity(table, brand, ram, storage, processor_series)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Spec not in the catalog")
+    return row
+
+def missing_platform_prices(payload):
+    return {k: v for k, v in (payload.get("platform_prices") or {}).items() if v == "Missing"}
+
+async def local_suggestion(brand, ram, storage, processor_series, platforms, platform_prices=None):
+    # Catalog prices of the spec (and any the caller sent) anchor the model
+    index = await get_spec_index()
+    similarity = get_similarity_index(index, get_brand_tier)
+    _, observed, _ = match_spec(index, brand, ram, storage, processor_series, similarity)
+    for platform, price in (platform_prices or {}).items():
+        if price != "Missing" and platform not in observed:
+            observed[platform] = [price]
+    text = suggest_locally(get_local_model(similarity), brand, ram, storage, processor_series, platforms, observed)
+    structured_response, strategy_notes = parse_suggestions(text)
+    return {"text": text, "structured": structured_response, "strategy": strategy_notes, "source": "local_model"}
 
 @app.post("/genai_suggestions")
 async def genai_suggestions(payload: dict):
+    # Answered by the local model; "llm": true also asks Gemini and returns
+    # its suggestion instead when it gives one
     brand = payload.get("brand")
     ram = payload.get("ram")
     storage = payload.get("storage")
     processor_series = payload.get("processor_series")
-    platform_prices = payload.get("platform_prices")
+    platform_prices = missing_platform_prices(payload)
 
-    platform_prices = {k: v for k, v in platform_prices.items() if v == "Missing"}
+    local = await local_suggestion(brand, ram, storage, processor_series, list(platform_prices), payload.get("platform_prices"))
+    if not payload.get("llm"):
+        return local
 
-    result = get_llm_price_suggestion(brand, ram, storage, processor_series, platform_prices)
+    result = await get_llm_price_suggestion_async(brand, ram, storage, processor_series, platform_prices)
 
     structured_response = []
     strategy_notes = ""
     if isinstance(result, str):
-        lines = result.strip().split("\n")
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if line.startswith("📌"):
-                parts = line.split("\u2192")
-                if len(parts) >= 2:
-                    price_line = f"{parts[0].replace('📌', '').strip()} → ₹{parts[1].strip()}"
-                    reason = ""
-                    i += 1
-                    while i < len(lines) and not lines[i].strip().startswith("📌"):
-                        reason += lines[i].strip() + " "
-                        i += 1
-                    structured_response.append({
-                        "platform": parts[0].replace("📌", "").strip(),
-                        "price": parts[1].strip().replace("₹", ""),
-                        "reason": reason.strip(),
-                        "formatted": f"📌 {price_line}\n{reason.strip()}"
-                    })
-                else:
-                    i += 1
-            else:
-                if any(keyword in line.lower() for keyword in ["logic", "strategy", "how", "pricing"]):
-                    strategy_notes += line + "\n"
-                i += 1
+        structured_response, strategy_notes = parse_suggestions(result)
+    if not structured_response:
+        return {**local, "genai_error": result if isinstance(result, str) and result else "⚠️ GenAI Error: No response"}
 
     return {
         "text": result,
         "structured": structured_response,
-        "strategy": strategy_notes.strip()
+        "strategy": strategy_notes,
+        "source": "genai",
+        "local": local["structured"]
     }
+
+@app.post("/genai_suggestions/stream")
+async def genai_suggestions_stream(payload: dict):
+    # NDJSON events: one "suggestion" per platform block as soon as the model
+    # has finished writing it, then "done" with the full text and strategy notes
+    chunks = stream_llm_price_suggestion(
+        payload.get("brand"), payload.get("ram"), payload.get("storage"),
+        payload.get("processor_series"), missing_platform_prices(payload)
+    )
+    return StreamingResponse(suggestion_events(chunks), media_type="application/x-ndjson")
+
+def genai_handle(job):
+    if job is None:
+        return None
+    return GenAIHandle(
+        job_id=job["id"], status=job["status"],
+        poll_url=f"/genai_jobs/{job['id']}", stream_url=f"/genai_jobs/{job['id']}/stream"
+    )
+
+@app.get("/search", response_model=SearchResponse, response_model_exclude_none=True)
+async def search(brand: str = Query(...), ram: str = Query(...), storage: str = Query(...), processor_series: str = Query(...), genai: bool = Query(False)):
+    # /search_products in one compact response; with genai=true the suggestion
+    # for the missing platforms is started right away and returned as a job handle
+    similarity = None
+    with span("search.index"):
+        if SPEC_LOOKUP == "mongo":
+            index = await load_spec_candidates(brand, ram, storage, processor_series)
+        else:
+            index = await get_spec_index()
+            similarity = get_similarity_index(index, get_brand_tier)
+
+    results, _, found_in_db = match_spec(index, brand, ram, storage, processor_series, similarity)
+    missing_platforms = get_missing_platforms(results)
+    job = None
+    if genai and missing_platforms:
+        # Runs alongside the SerpAPI check below
+        job = start_genai_job(brand, ram, storage, processor_series, {platform: "Missing" for platform in missing_platforms})
+
+    found_on_web = False
+    if not found_in_db:
+        found_on_web = await search_product_on_web_async(
+            web_query(brand, ram, storage, processor_series), brand=brand, ram=ram, storage=storage, processor=processor_series
+        )
+        if not found_on_web and job is not None:
+            # Neither in the catalog nor online: nothing worth suggesting a price for
+            cancel_genai_job(job)
+            job = None
+
+    result = find_products(index, brand, ram, storage, processor_series, found_on_web, similarity)
+    local = None
+    if similarity is not None and result["business_opportunity"]:
+        # Sub-millisecond, so it comes with the response; GenAI refines it later
+        local = await local_suggestion(brand, ram, storage, processor_series, list(result["business_opportunity"]))
+    spec = {"brand": brand, "ram": ram, "storage": storage, "processor_series": processor_series}
+    return search_response(spec, result, genai_handle(job), local)
+
+@app.get("/genai_jobs/{job_id}")
+async def genai_job(job_id: str, wait: float = Query(0, ge=0, le=120)):
+    # Poll a /search GenAI job; wait=N holds the request until it finishes or N seconds pass
+    job = get_genai_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired GenAI job")
+    if wait:
+        await wait_genai_job(job, wait)
+    return genai_job_result(job)
+
+@app.get("/genai_jobs/{job_id}/stream")
+async def genai_job_stream(job_id: str):
+    # Same NDJSON events as /genai_suggestions/stream, replayed from the start
+    job = get_genai_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired GenAI job")
+    return StreamingResponse(suggestion_events(follow_genai_job(job)), media_type="application/x-ndjson")
@@ -0,0 +1,622 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from ingest import DATA_DIR, DATA_FILES
+
+# Run from the code/ directory: python benchmarks.py <benchmark> [options]
+
+
+def load_catalog(scale=1):
+    # Platform dumps from Data/, repeated `scale` times for synthetic growth
+    catalog = {}
+    for coll, filename in DATA_FILES.items():
+        with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as f:
+            docs = json.load(f)
+        catalog[coll] = [dict(doc) for _ in range(scale) for doc in docs]
+    return catalog
+
+
+class SlowCollection:
+    # Wraps a mongomock collection and adds a fixed network-like delay per query
+    def __init__(self, collection, latency):
+        self._collection = collection
+        self._latency = latency
+
+    def find(self, *args, **kwargs):
+        time.sleep(self._latency)
+        return self._collection.find(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class SlowDatabase:
+    def __init__(self, database, latency):
+        self._database = database
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return SlowCollection(self._database[name], self._latency)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+class SlowClient:
+    def __init__(self, client, latency):
+        self._client = client
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return SlowDatabase(self._client[name], self._latency)
+
+
+def seeded_client(scale=1, latency=0.0):
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("mongomock is required for the benchmarks: pip install mongomock")
+
+    import data_access
+    client = mongomock.MongoClient()
+    for coll, docs in load_catalog(scale).items():
+        client[data_access.MONGO_DB][coll].insert_many(docs)
+    return SlowClient(client, latency) if latency else client
+
+
+class UpstreamError(Exception):
+    # Injected failures look like a 503, which the call layer retries
+    code = 503
+
+
+class FakeGoogleSearch:
+    # SerpAPI stand-in: returns no organic results after `latency` seconds,
+    # failing a `failure_rate` share of calls
+    latency = 0.0
+    failure_rate = 0.0
+
+    def __init__(self, params):
+        self.params = params
+
+    def get_dict(self):
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise UpstreamError("injected SerpAPI failure")
+        return {"organic_results": []}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    # Gemini stand-in: answers in the 📌 format after `latency` seconds; with
+    # stream=True the same text arrives in small chunks spread over `latency`.
+    # A request timeout shorter than `latency` ends the call like the real client
+    text = (
+        "📌 Flipkart → ₹57,000\nReason: Based on average pricing of similar products.\n\n"
+        "📌 Croma → ₹59,000\nReason: Higher due to premium platform and product visibility.\n\n"
+        "Pricing strategy: average of listed platforms adjusted for brand tier."
+    )
+    chunk_size = 16
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and timeout < self.latency:
+            time.sleep(timeout)
+            raise TimeoutError("injected Gemini deadline exceeded")
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise UpstreamError("injected Gemini failure")
+        return FakeResponse(self.text)
+
+    def _stream(self):
+        chunks = [self.text[i:i + self.chunk_size] for i in range(0, len(self.text), self.chunk_size)]
+        for i, chunk in enumerate(chunks):
+            time.sleep(self.latency / len(chunks))
+            if i == len(chunks) // 2 and random.random() < self.failure_rate:
+                raise UpstreamError("injected Gemini failure mid-stream")
+            yield FakeResponse(chunk)
+
+
+def stub_upstreams(serpapi_latency=0.0, genai_latency=0.0, failure_rate=0.0):
+    import tempfile
+    os.environ.setdefault("WEB_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "web_cache.sqlite3"))
+    import web_utils
+    import genai_utils
+    FakeGoogleSearch.latency = serpapi_latency
+    FakeGoogleSearch.failure_rate = failure_rate
+    web_utils.GoogleSearch = FakeGoogleSearch
+    web_utils.SERPAPI_KEY = web_utils.SERPAPI_KEY or "benchmark"
+    web_utils.web_cache.clear()
+    genai_utils.set_model(FakeGenerativeModel(genai_latency, failure_rate))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize(latencies, wall):
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3)
+    }
+
+
+async def run_clients(call, clients, requests_per_client):
+    # call() may return False to count a failed request
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            if await call() is False:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return {**summarize(latencies, time.perf_counter() - start), "errors": errors}
+
+
+def bench_mongo(args):
+    # Blocking sequential fan-out (previous behaviour) vs concurrent async fan-out
+    import data_access
+    data_access.set_client(seeded_client(args.scale, args.latency))
+    query = {"Brand": "Dell", "RAM": "16 GB"}
+    projection = {"_id": 0, "Brand": 1, "RAM": 1, "Storage": 1, "Price": 1}
+
+    async def blocking_fan_out():
+        return {coll: data_access._find(coll, query, projection) for coll in data_access.collections}
+
+    async def async_fan_out():
+        return await data_access.find_in_collections(data_access.collections, query, projection)
+
+    report = {}
+    for name, call in [("blocking", blocking_fan_out), ("async", async_fan_out)]:
+        report[name] = asyncio.run(run_clients(call, args.clients, args.requests))
+    return report
+
+
+SAMPLE_QUERIES = [
+    "What is the price of {brand} {proc} on {platform}?",
+    "Tell me prices of {brand} {proc} across platforms",
+    "{brand} {ram} RAM {proc} price in {platform}",
+    "{brand} laptop with {ram} and {storage} SSD",
+    "cheapest {proc} {storage} {ram} {brand}",
+    "is {brand} {proc} {ram} {storage} available on {platform}"
+]
+
+
+def sample_queries(count):
+    import itertools
+    combos = itertools.product(
+        ["Dell", "HP", "Lenovo", "ASUS", "Apple", "Acer", "MSI"],
+        ["i5", "Core i7", "Ryzen 5", "m3", "Core Ultra 7", "i3"],
+        ["8 GB", "16GB", "32 gb"],
+        ["512GB", "1 TB", "256 GB"],
+        ["flipkart", "croma", "reliance", "pai"]
+    )
+    queries = []
+    for template, (brand, proc, ram, storage, platform) in zip(itertools.cycle(SAMPLE_QUERIES), itertools.cycle(combos)):
+        queries.append(template.format(brand=brand, proc=proc, ram=ram, storage=storage, platform=platform))
+        if len(queries) == count:
+            return queries
+
+
+def legacy_extract_components(query, normalize_ram, normalize_storage, normalize_processor, collections):
+    # extract_components before the compiled parser, kept for comparison
+    query = query.lower()
+    brand = next((b for b in ["dell", "hp", "asus", "acer", "apple"] if b in query), None)
+    ram = normalize_ram(next((r for r in ["8gb", "16gb", "32gb", "64gb"] if r in query.replace(" ", "")), None))
+    storage = normalize_storage(next((s for s in ["256gb", "512gb", "1tb", "2tb"] if s in query.replace(" ", "")), None))
+    processor = normalize_processor(next((p for p in ["i3", "i5", "i7", "i9", "ryzen5", "ryzen7"] if p in query.replace(" ", "")), None))
+    platform = next((p for p in collections if p in query), None)
+    return brand, ram, storage, processor, platform
+
+
+def bench_parser(args):
+    import chatbot_query
+    from query_parser import build_query_parser, normalize_processor, normalize_ram, normalize_storage, vocabulary_from_products
+
+    queries = sample_queries(args.clients * args.requests * 100)
+    vocabulary = vocabulary_from_products(load_catalog())
+    chatbot_query.query_parser = build_query_parser(vocabulary["brands"], vocabulary["processors"])
+
+    def legacy(query):
+        return legacy_extract_components(query, normalize_ram, normalize_storage, normalize_processor, chatbot_query.collections)
+
+    report = {}
+    for name, extract in [("legacy", legacy), ("compiled", chatbot_query.extract_components)]:
+        start = time.perf_counter()
+        for query in queries:
+            extract(query)
+        wall = time.perf_counter() - start
+        report[name] = {
+            "queries": len(queries),
+            "queries_per_second": round(len(queries) / wall, 1),
+            "us_per_query": round(wall / len(queries) * 1e6, 3)
+        }
+    return report
+
+
+def legacy_format_db_results(db_results):
+    # pandas-based chatbot formatting before format_db_results, kept for comparison
+    import pandas as pd
+    df = pd.DataFrame(db_results)
+    response_lines = ["✅ Product found in our database:\n"]
+    for platform, group in df.groupby("platform"):
+        response_lines.append(f"🔸 **{platform.capitalize()}**")
+        for _, row in group.iterrows():
+            response_lines.append(
+                f"• **Product:** {row['product']}\n"
+                f"  → ₹{row['price']}\n"
+                f"  RAM: {row['ram']} | Storage: {row['storage']} | Processor: {row['processor']}\n"
+            )
+    return "\n".join(response_lines)
+
+
+def import_seconds(statement, runs=5):
+    # Median wall time of a fresh interpreter running the import statement
+    import statistics
+    import subprocess
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], cwd=code_dir, check=True)
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings), 4)
+
+
+def asgi_client(app):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def bench_chatbot(args):
+    import data_access
+    data_access.set_client(seeded_client(args.scale, args.latency))
+    stub_upstreams()
+    import chatbot_query
+
+    report = {
+        "startup_seconds": {
+            "with_pandas": import_seconds("import pandas, chatbot_query"),
+            "chatbot_query": import_seconds("import chatbot_query")
+        }
+    }
+
+    async def run():
+        queries = [q for q in sample_queries(200) if "available" not in q]
+        db_results = await chatbot_query.get_price_from_db("dell", "", "", "", None)
+        formatting = {}
+        for name, formatter in [("pandas", legacy_format_db_results), ("plain", chatbot_query.format_db_results)]:
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                formatter(db_results)
+            formatting[name] = {
+                "rows": len(db_results),
+                "ms_per_response": round((time.perf_counter() - start) / args.requests * 1000, 3)
+            }
+
+        async with asgi_client(chatbot_query.app) as client:
+            counter = iter(range(10 ** 9))
+
+            async def call():
+                await client.post("/chatbot", json={"query": queries[next(counter) % len(queries)]})
+
+            await call()
+            return formatting, await run_clients(call, args.clients, args.requests)
+
+    report["formatting"], report["requests"] = asyncio.run(run())
+    return report
+
+
+def catalog_specs(catalog):
+    # Distinct (brand, ram, storage, processor series) listings, in catalog order
+    specs = {}
+    for docs in catalog.values():
+        for doc in docs:
+            spec = tuple(str(doc.get(field) or "").strip() for field in ["Brand", "RAM", "Storage", "Processor Series"])
+            if all(spec):
+                specs.setdefault(spec, None)
+    return list(specs)
+
+
+def endpoint_calls(backend, chatbot, catalog):
+    # One request generator per endpoint, cycling through catalog-derived inputs;
+    # every tenth spec lookup is a miss, so the SerpAPI fallback is exercised
+    import itertools
+    specs = catalog_specs(catalog)
+    lookups = []
+    for i, (brand, ram, storage, series) in enumerate(specs):
+        lookups.append((brand, ram, storage, series))
+        if i % 9 == 0:
+            lookups.append((brand, "64 GB", "4 TB", series))
+    lookups = itertools.cycle(lookups)
+    selections = itertools.cycle([(brand, None, None) for brand, *_ in specs[::7]] + [spec[:3] for spec in specs[::3]])
+    suggestions = itertools.cycle(specs)
+    queries = itertools.cycle(sample_queries(500))
+
+    def ok(response):
+        return response.status_code == 200
+
+    async def search_products():
+        brand, ram, storage, series = next(lookups)
+        return ok(await backend.get("/search_products", params={"brand": brand, "ram": ram, "storage": storage, "processor_series": series}))
+
+    async def get_filters():
+        params = {name: value for name, value in zip(["brand", "ram", "storage"], next(selections)) if value}
+        return ok(await backend.get("/get_filters", params=params))
+
+    async def genai_suggestions(llm=False):
+        brand, ram, storage, series = next(suggestions)
+        payload = {
+            "brand": brand, "ram": ram, "storage": storage, "processor_series": series,
+            "platform_prices": {"reliance": 60000, "pai": "Missing", "croma": "Missing", "flipkart": 58000},
+            "llm": llm
+        }
+        return ok(await backend.post("/genai_suggestions", json=payload))
+
+    async def chatbot_request():
+        return ok(await chatbot.post("/chatbot", json={"query": next(queries)}))
+
+    return {
+        "/search_products": search_products,
+        "/get_filters": get_filters,
+        "/genai_suggestions": genai_suggestions,
+        "/genai_suggestions (llm)": lambda: genai_suggestions(llm=True),
+        "/chatbot": chatbot_request
+    }
+
+
+def bench_endpoints(args, scale=None):
+    # All four endpoints against a seeded Mongo stand-in with latency-injecting
+    # SerpAPI and Gemini fakes; the web and GenAI caches start empty
+    import data_access
+    scale = scale or args.scale
+    catalog = load_catalog(scale)
+    data_access.set_client(seeded_client(scale, args.latency))
+    stub_upstreams(args.serpapi_latency, args.genai_latency, args.failure_rate)
+    import backend2
+    import chatbot_query
+    from catalog_table import refresh_catalog_table
+    from facet_index import refresh_facet_index
+    from spec_index import refresh_spec_index
+
+    async def run():
+        start = time.perf_counter()
+        # Rebuilt explicitly: an earlier scale may have left indexes in memory
+        await refresh_spec_index()
+        await refresh_facet_index()
+        await refresh_catalog_table()
+        await chatbot_query.load_query_parser()
+        build_seconds = round(time.perf_counter() - start, 3)
+
+        async with asgi_client(backend2.app) as backend, asgi_client(chatbot_query.app) as chatbot:
+            endpoints = {}
+            for path, call in endpoint_calls(backend, chatbot, catalog).items():
+                endpoints[path] = await run_clients(call, args.clients, args.requests)
+        return build_seconds, endpoints
+
+    build_seconds, endpoints = asyncio.run(run())
+    return {
+        "scale": scale,
+        "catalog_size": sum(len(docs) for docs in catalog.values()),
+        "index_build_seconds": build_seconds,
+        "endpoints": endpoints
+    }
+
+
+async def asgi_stream(app, path, payload):
+    # POSTs straight to the ASGI app and yields body chunks as they are sent;
+    # httpx's ASGITransport buffers the whole body, hiding time to first byte
+    body = json.dumps(payload).encode("utf-8")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 0), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    }
+    messages = asyncio.Queue()
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    task = asyncio.ensure_future(app(scope, receive, messages.put))
+    try:
+        while True:
+            message = await messages.get()
+            if message["type"] == "http.response.body":
+                if message.get("body"):
+                    yield message["body"]
+                if not message.get("more_body"):
+                    break
+    finally:
+        await task
+
+
+def bench_similarity(args):
+    # k-NN similar products (every platform, brute force over the feature
+    # matrices) vs the exact-key lookup, over a catalog repeated --scale times
+    from backend2 import get_brand_tier
+    from data_access import collections
+    from similarity_index import build_similarity_index, lookup_nearest
+    from spec_index import build_spec_index, lookup_similar
+
+    catalog = load_catalog(args.scale)
+    index = build_spec_index(catalog)
+    start = time.perf_counter()
+    similarity = build_similarity_index(index, get_brand_tier)
+    build_seconds = round(time.perf_counter() - start, 3)
+
+    specs = catalog_specs(catalog)
+    lookups = [specs[i % len(specs)] for i in range(args.clients * args.requests)]
+    report = {"catalog_size": index["size"], "build_seconds": build_seconds}
+    for name, lookup in [("exact_key", lambda *spec: lookup_similar(index, *spec)), ("knn", lambda *spec: lookup_nearest(similarity, *spec))]:
+        latencies = []
+        start = time.perf_counter()
+        for spec in lookups:
+            t = time.perf_counter()
+            for coll in collections:
+                lookup(coll, *spec)
+            latencies.append(time.perf_counter() - t)
+        report[name] = summarize(latencies, time.perf_counter() - start)
+    return report
+
+
+def bench_calibration(args):
+    # Fitting the platform and brand-tier factors over a catalog repeated --scale times
+    from backend2 import get_brand_tier
+    from calibrate_factors import fit_factors
+
+    catalog = load_catalog(args.scale)
+    start = time.perf_counter()
+    fitted = fit_factors(catalog, get_brand_tier)
+    return {"catalog_size": sum(len(docs) for docs in catalog.values()), "fit_seconds": round(time.perf_counter() - start, 3), **fitted}
+
+
+def bench_local_model(args):
+    # Training the local pricing model and answering with it, over a catalog
+    # repeated --scale times
+    from backend2 import get_brand_tier
+    from data_access import collections
+    from local_model import suggest_locally, train_local_model
+    from similarity_index import build_similarity_index
+    from spec_index import build_spec_index
+
+    catalog = load_catalog(args.scale)
+    similarity = build_similarity_index(build_spec_index(catalog), get_brand_tier)
+    model = train_local_model(similarity)
+
+    specs = catalog_specs(catalog)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.clients * args.requests):
+        spec = specs[i % len(specs)]
+        t = time.perf_counter()
+        suggest_locally(model, *spec, collections[1:], {collections[0]: [60000]})
+        latencies.append(time.perf_counter() - t)
+    return {
+        "catalog_size": similarity["size"], "listings": model["listings"], "train_seconds": model["train_seconds"],
+        "rmse_log2": round(model["rmse_log2"], 4), "suggest": summarize(latencies, time.perf_counter() - start)
+    }
+
+
+def bench_genai_stream(args):
+    # Time to the first structured suggestion: streamed NDJSON vs the full response
+    stub_upstreams(genai_latency=args.genai_latency)
+    import backend2
+
+    async def run():
+        counter = iter(range(10 ** 9))
+
+        def payload():
+            # A new spec per request so every call reaches the (fake) model
+            return {
+                "brand": "Dell", "ram": f"{next(counter)} GB", "storage": "512 GB", "processor_series": "Core i5",
+                "platform_prices": {"reliance": 60000, "croma": "Missing", "flipkart": "Missing"},
+                "llm": True
+            }
+
+        report = {}
+        async with asgi_client(backend2.app) as client:
+            async def full():
+                start = time.perf_counter()
+                response = await client.post("/genai_suggestions", json=payload())
+                first.append(time.perf_counter() - start)
+                return response.status_code == 200 and bool(response.json()["structured"])
+
+            async def streamed():
+                start = time.perf_counter()
+                buffer, seen = b"", False
+                async for chunk in asgi_stream(backend2.app, "/genai_suggestions/stream", payload()):
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    if not seen and any(json.loads(line)["type"] == "suggestion" for line in lines if line):
+                        first.append(time.perf_counter() - start)
+                        seen = True
+                return seen
+
+            for name, call in [("full", full), ("stream", streamed)]:
+                first = []
+                result = await run_clients(call, args.clients, args.requests)
+                result["first_suggestion_p50_ms"] = round(percentile(first, 50) * 1000, 3)
+                result["first_suggestion_p95_ms"] = round(percentile(first, 95) * 1000, 3)
+                report[name] = result
+        return report
+
+    return asyncio.run(run())
+
+
+def bench_suite(args):
+    # bench_endpoints at every catalog multiplier in --scales
+    return {f"x{scale}": bench_endpoints(args, scale) for scale in args.scales}
+
+
+BENCHMARKS = {
+    "mongo": bench_mongo,
+    "parser": bench_parser,
+    "chatbot": bench_chatbot,
+    "endpoints": bench_endpoints,
+    "genai_stream": bench_genai_stream,
+    "similarity": bench_similarity,
+    "calibration": bench_calibration,
+    "local_model": bench_local_model,
+    "suite": bench_suite
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price suggestion system benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--clients", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--scale", type=int, default=1, help="catalog size multiplier")
+    parser.add_argument("--scales", type=lambda text: [int(s) for s in text.split(",")], default=[1, 10, 100],
+                        help="comma-separated catalog multipliers for the suite")
+    parser.add_argument("--latency", type=float, default=0.02, help="injected Mongo latency in seconds")
+    parser.add_argument("--serpapi-latency", type=float, default=0.3, help="fake SerpAPI latency in seconds")
+    parser.add_argument("--genai-latency", type=float, default=1.0, help="fake Gemini latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of fake SerpAPI and Gemini calls that fail")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {"benchmark": args.benchmark, "config": vars(args), "results": BENCHMARKS[args.benchmark](args)}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timezone
+import numpy as np
+from ingest import processor_family, size_gb
+from pricing_factors import PRICING_FACTORS_PATH, write_factors
+
+# Run from the code/ directory: python calibrate_factors.py [--dry-run] [--output PATH]
+#
+# Fits log(price) = configuration + brand tier + platform over every listing,
+# with one fixed effect per (RAM, storage, processor family) configuration.
+# Tier and platform effects are identified by configurations sold under
+# several tiers or on several platforms; the exponentiated effects, relative
+# to the reference tier and platform, are the new factors
+
+CALIBRATION_PROJECTION = {"_id": 0, "Brand": 1, "RAM": 1, "Storage": 1, "Processor Series": 1, "Processor Type": 1, "Price": 1}
+
+REFERENCE_PLATFORM = "reliance"
+REFERENCE_TIER = "mid"
+TIERS = ["budget", "mid", "premium"]
+
+
+def listing_arrays(products_by_coll, brand_tier):
+    # Configuration, tier and platform codes plus log price per priced listing
+    platforms = list(products_by_coll)
+    configs, tiers = {}, {}
+    config_ids, tier_ids, platform_ids, log_prices = [], [], [], []
+
+    for platform_id, products in enumerate(products_by_coll.values()):
+        for doc in products:
+            try:
+                price = float(doc.get("Price"))
+            except (TypeError, ValueError):
+                continue
+            if not price > 0:
+                continue
+            fields = (doc.get("RAM"), doc.get("Storage"), doc.get("Processor Series"), doc.get("Processor Type"))
+            config = configs.get(fields)
+            if config is None:
+                key = (size_gb(fields[0]), size_gb(fields[1]), processor_family(fields[2], fields[3]))
+                config = configs[fields] = None if None in key else key
+            if config is None:
+                continue
+            brand = str(doc.get("Brand") or "")
+            tier = tiers.get(brand)
+            if tier is None:
+                tier = tiers[brand] = TIERS.index(brand_tier(brand))
+            config_ids.append(config)
+            tier_ids.append(tier)
+            platform_ids.append(platform_id)
+            log_prices.append(math.log(price))
+
+    # Dense configuration codes
+    codes = {}
+    config_ids = np.fromiter((codes.setdefault(config, len(codes)) for config in config_ids), dtype=np.int64, count=len(config_ids))
+    return platforms, config_ids, np.asarray(tier_ids, dtype=np.int64), np.asarray(platform_ids, dtype=np.int64), np.asarray(log_prices)
+
+
+def _demean(values, groups, counts):
+    # Subtract each configuration's mean (the fixed effect) from every column
+    if values.ndim == 1:
+        return values - (np.bincount(groups, weights=values, minlength=len(counts)) / counts)[groups]
+    return np.column_stack([_demean(values[:, j], groups, counts) for j in range(values.shape[1])])
+
+
+def fit_factors(products_by_coll, brand_tier):
+    platforms, configs, tiers, platform_ids, y = listing_arrays(products_by_coll, brand_tier)
+
+    # Only configurations with several listings say anything about the effects
+    counts = np.bincount(configs)
+    keep = counts[configs] > 1
+    configs, tiers, platform_ids, y = configs[keep], tiers[keep], platform_ids[keep], y[keep]
+    configs = np.unique(configs, return_inverse=True)[1]
+    counts = np.bincount(configs).astype(np.float64)
+
+    # Dummies for every tier and platform except the references
+    reference_platform = platforms.index(REFERENCE_PLATFORM) if REFERENCE_PLATFORM in platforms else 0
+    tier_columns = [t for t in range(len(TIERS)) if TIERS[t] != REFERENCE_TIER]
+    platform_columns = [p for p in range(len(platforms)) if p != reference_platform]
+    X = np.column_stack(
+        [(tiers == t).astype(np.float64) for t in tier_columns] +
+        [(platform_ids == p).astype(np.float64) for p in platform_columns]
+    )
+
+    Xd = _demean(X, configs, counts)
+    yd = _demean(y, configs, counts)
+    # Effects with no within-configuration variation cannot be estimated
+    identified = np.abs(Xd).sum(axis=0) > 1e-9
+    beta = np.zeros(X.shape[1])
+    if identified.any():
+        beta[identified] = np.linalg.lstsq(Xd[:, identified], yd, rcond=None)[0]
+    residuals = yd - Xd @ beta
+
+    effects = dict(zip([("tier", t) for t in tier_columns] + [("platform", p) for p in platform_columns], zip(beta, identified)))
+    brand_factors = {}
+    for t, tier in enumerate(TIERS):
+        effect, ok = effects.get(("tier", t), (0.0, True))
+        if ok:
+            brand_factors[tier] = round(math.exp(effect), 3)
+    platform_factors = {}
+    for p, platform in enumerate(platforms):
+        effect, ok = effects.get(("platform", p), (0.0, True))
+        if ok:
+            platform_factors[platform] = round(math.exp(effect), 3)
+
+    total = float(((yd - yd.mean()) ** 2).sum()) if len(yd) else 0.0
+    return {
+        "platform_factors": platform_factors,
+        "brand_factors": brand_factors,
+        "fit": {
+            "listings": int(len(y)),
+            "configurations": int(len(counts)),
+            "rmse_log_price": round(float(np.sqrt((residuals ** 2).mean())), 4) if len(y) else None,
+            "within_r2": round(1 - float((residuals ** 2).sum()) / total, 4) if total else None,
+            "reference_platform": platforms[reference_platform],
+            "reference_tier": REFERENCE_TIER
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit platform and brand-tier price factors from the catalog")
+    parser.add_argument("--output", default=PRICING_FACTORS_PATH, help="factors file the service loads")
+    parser.add_argument("--dry-run", action="store_true", help="print the fit without writing it")
+    args = parser.parse_args()
+
+    from backend2 import get_brand_tier
+    from catalog_snapshot import load_products
+
+    start = time.perf_counter()
+    products_by_coll = asyncio.run(load_products(CALIBRATION_PROJECTION))
+    fitted = fit_factors(products_by_coll, get_brand_tier)
+    fitted["fit"]["seconds"] = round(time.perf_counter() - start, 3)
+    fitted["fitted_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    if args.dry_run:
+        print(json.dumps(fitted, indent=2))
+        return
+    factors = write_factors(args.output, fitted)
+    print(f"✅ Pricing factors v{factors['version']} written to {args.output}")
+    print(json.dumps(factors, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+from collections.abc import Sequence
+import numpy as np
+from data_access import collections, find_in_collections
+
+# Run from the code/ directory: python catalog_snapshot.py [--output DIR]
+
+SNAPSHOT_VERSION = 1
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", "")
+
+# Dictionary-encoded string fields and float fields stored per product
+STRING_FIELDS = {
+    "brand": "Brand",
+    "ram": "RAM",
+    "storage": "Storage",
+    "processor_type": "Processor Type",
+    "processor_series": "Processor Series"
+}
+FLOAT_FIELDS = {
+    "price": "Price",
+    "mrp": "MRP",
+    "discount": "Discount"
+}
+
+SNAPSHOT_PROJECTION = {"_id": 0, "Product Name": 1, **{field: 1 for field in [*STRING_FIELDS.values(), *FLOAT_FIELDS.values()]}}
+
+_snapshot = None
+
+
+def _number(value):
+    # (value, kind) where kind 0 = missing, 1 = int, 2 = float, so rows read
+    # back with the same JSON types Mongo returns
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan, 0
+    return float(value), 1 if isinstance(value, int) else 2
+
+
+def export_snapshot(path, products_by_coll):
+    # One .npy file per column plus meta.json with the dictionaries; rows are
+    # grouped by platform so each platform is a contiguous row range
+    dictionaries = {name: {} for name in STRING_FIELDS}
+    codes = {name: [] for name in STRING_FIELDS}
+    floats = {name: [] for name in FLOAT_FIELDS}
+    kinds = {name: [] for name in [*FLOAT_FIELDS, "name"]}
+    names = bytearray()
+    offsets = [0]
+    ranges = {}
+
+    for coll, products in products_by_coll.items():
+        start = len(offsets) - 1
+        for doc in products:
+            for name, field in STRING_FIELDS.items():
+                value = doc.get(field)
+                # Keyed by type too so a numeric RAM of 16 does not collapse into "16"
+                key = (type(value).__name__, value)
+                codes[name].append(-1 if value is None else dictionaries[name].setdefault(key, len(dictionaries[name])))
+            for name, field in FLOAT_FIELDS.items():
+                value, kind = _number(doc.get(field))
+                floats[name].append(value)
+                kinds[name].append(kind)
+            product_name = doc.get("Product Name")
+            names += str(product_name).encode("utf-8") if product_name is not None else b""
+            kinds["name"].append(0 if product_name is None else 1)
+            offsets.append(len(names))
+        ranges[coll] = [start, len(offsets) - 1]
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    for name in STRING_FIELDS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(codes[name], dtype=np.int32))
+    for name in FLOAT_FIELDS:
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(floats[name], dtype=np.float64))
+    for name, values in kinds.items():
+        np.save(os.path.join(tmp_path, f"{name}_kind.npy"), np.asarray(values, dtype=np.int8))
+    np.save(os.path.join(tmp_path, "name_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+    np.save(os.path.join(tmp_path, "name_data.npy"), np.frombuffer(bytes(names), dtype=np.uint8))
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "rows": len(offsets) - 1,
+        "ranges": ranges,
+        "dictionaries": {name: [value for _, value in values] for name, values in dictionaries.items()}
+    }
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    # Swap the finished directory in so readers never see a partial snapshot
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return meta
+
+
+def load_snapshot(path):
+    # Columns are memory-mapped read-only, so forked or sibling workers share the pages
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported catalog snapshot version {meta.get('version')}")
+
+    columns = {}
+    for name in [*STRING_FIELDS, *FLOAT_FIELDS, *(f"{name}_kind" for name in [*FLOAT_FIELDS, "name"]), "name_offsets", "name_data"]:
+        columns[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+    return {"path": path, "meta": meta, "columns": columns}
+
+
+class SnapshotProducts(Sequence):
+    # Read-only product dicts for one platform's row range, built on access
+    def __init__(self, snapshot, start, end, fields=None):
+        self.snapshot = snapshot
+        self.start = start
+        self.end = end
+        self.fields = fields
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return snapshot_row(self.snapshot, self.start + i, self.fields)
+
+
+def snapshot_row(snapshot, row, fields=None):
+    # fields limits the row to a projection's fields, like the Mongo path
+    columns = snapshot["columns"]
+    dictionaries = snapshot["meta"]["dictionaries"]
+
+    doc = {}
+    if (fields is None or "Product Name" in fields) and columns["name_kind"][row]:
+        offsets = columns["name_offsets"]
+        doc["Product Name"] = bytes(columns["name_data"][offsets[row]:offsets[row + 1]]).decode("utf-8")
+    for name, field in FLOAT_FIELDS.items():
+        kind = columns[f"{name}_kind"][row]
+        if kind and (fields is None or field in fields):
+            value = float(columns[name][row])
+            doc[field] = int(value) if kind == 1 else value
+    for name, field in STRING_FIELDS.items():
+        code = int(columns[name][row])
+        if code >= 0 and (fields is None or field in fields):
+            doc[field] = dictionaries[name][code]
+    return doc
+
+
+def snapshot_products_by_coll(snapshot, projection=None):
+    fields = {field for field, included in (projection or {}).items() if included and field != "_id"} or None
+    return {
+        coll: SnapshotProducts(snapshot, start, end, fields)
+        for coll, (start, end) in snapshot["meta"]["ranges"].items()
+    }
+
+
+def get_snapshot():
+    # Reloaded when a newer snapshot has been exported to the same path
+    global _snapshot
+    meta_path = os.path.join(CATALOG_SNAPSHOT, "meta.json")
+    if not CATALOG_SNAPSHOT or not os.path.exists(meta_path):
+        return _snapshot
+    mtime = os.path.getmtime(meta_path)
+    if _snapshot is None or _snapshot["mtime"] != mtime:
+        _snapshot = load_snapshot(CATALOG_SNAPSHOT)
+        _snapshot["mtime"] = mtime
+    return _snapshot
+
+
+def snapshot_status():
+    if _snapshot is None:
+        return None
+    meta = _snapshot["meta"]
+    return {
+        "path": _snapshot["path"], "rows": meta["rows"], "created_at": meta["created_at"],
+        "age_seconds": round(time.time() - meta["created_at"], 3)
+    }
+
+
+async def load_products(projection):
+    # Catalog rows for index builds: from the snapshot when CATALOG_SNAPSHOT
+    # points at one, otherwise straight from Mongo
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot_products_by_coll(snapshot, projection)
+    return await find_in_collections(collections, {}, projection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the platform collections to a columnar catalog snapshot")
+    parser.add_argument("--output", default=CATALOG_SNAPSHOT or "catalog_snapshot", help="snapshot directory")
+    args = parser.parse_args()
+
+    products_by_coll = asyncio.run(find_in_collections(collections, {}, SNAPSHOT_PROJECTION))
+    meta = export_snapshot(args.output, products_by_coll)
+    print(f"✅ Snapshot written to {args.output}: {meta['rows']} products")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import asyncio
+import time
+import numpy as np
+from catalog_snapshot import get_snapshot, load_products
+from query_parser import normalize_ram, normalize_storage, normalize_processor
+
+TABLE_PROJECTION = {
+    "_id": 0, "Product Name": 1, "Price": 1, "RAM": 1, "Storage": 1,
+    "Processor Series": 1, "Processor Type": 1, "Brand": 1
+}
+
+# Dictionary-encoded filter columns; brand and processor are matched by substring
+KEY_COLUMNS = ["platform", "brand", "ram", "storage", "processor"]
+
+_table = None
+_build_lock = asyncio.Lock()
+
+
+def _encode(values):
+    dictionary = {}
+    codes = np.fromiter((dictionary.setdefault(v, len(dictionary)) for v in values), dtype=np.int32, count=len(values))
+    return codes, dictionary
+
+
+def _postings(codes, size):
+    # Row ids per code, ascending so results keep catalog order
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(size + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(size)]
+
+
+def build_catalog_table(products_by_coll):
+    keys = {column: [] for column in KEY_COLUMNS}
+    positions = []
+    vocabulary = {"brands": set(), "processors": set()}
+
+    for coll, products in products_by_coll.items():
+        for position, doc in enumerate(products):
+            # Normalized once per document instead of once per chatbot message
+            keys["platform"].append(coll)
+            keys["brand"].append(str(doc.get("Brand", "")).lower())
+            keys["ram"].append(normalize_ram(doc.get("RAM", "")))
+            keys["storage"].append(normalize_storage(doc.get("Storage", "")))
+            keys["processor"].append(normalize_processor(f"{doc.get('Processor Series', '')} {doc.get('Processor Type', '')}"))
+            positions.append(position)
+
+            if doc.get("Brand"):
+                vocabulary["brands"].add(str(doc["Brand"]))
+            if doc.get("Processor Series"):
+                vocabulary["processors"].add(str(doc["Processor Series"]))
+
+    # Display fields are read back from products_by_coll (possibly snapshot-backed)
+    table = {
+        "columns": {}, "dictionaries": {}, "postings": {},
+        "products": products_by_coll,
+        "positions": np.asarray(positions, dtype=np.int64),
+        "vocabulary": vocabulary
+    }
+    for column in KEY_COLUMNS:
+        codes, dictionary = _encode(keys[column])
+        table["columns"][column] = codes
+        table["dictionaries"][column] = dictionary
+        table["postings"][column] = _postings(codes, len(dictionary))
+
+    table["platforms"] = list(table["dictionaries"]["platform"])
+    table["size"] = len(positions)
+    table["built_at"] = time.time()
+    return table
+
+
+def _stale(table):
+    # Rebuilt when a newer snapshot has been exported; Mongo-backed tables
+    # are rebuilt through refresh_catalog_table (POST /refresh_index)
+    return table is None or table["snapshot"] is not get_snapshot()
+
+
+async def get_catalog_table():
+    if _stale(_table):
+        async with _build_lock:
+            if _stale(_table):
+                await refresh_catalog_table()
+    return _table
+
+
+async def refresh_catalog_table(products_by_coll=None):
+    global _table
+    snapshot = get_snapshot()
+    if products_by_coll is None:
+        products_by_coll = await load_products(TABLE_PROJECTION)
+    table = build_catalog_table(products_by_coll)
+    table["snapshot"] = snapshot
+    _table = table
+    return _table
+
+
+def _equal_rows(table, column, value):
+    code = table["dictionaries"][column].get(value)
+    return table["postings"][column][code] if code is not None else np.empty(0, dtype=np.int64)
+
+
+def _containing_rows(table, column, value):
+    # Substring match against the (small) dictionary, then union of postings
+    postings = [table["postings"][column][code] for key, code in table["dictionaries"][column].items() if value in key]
+    if not postings:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(postings))
+
+
+def select_rows(table, brand=None, ram=None, storage=None, processor=None, platform=None):
+    candidates = []
+    if platform:
+        candidates.append(_equal_rows(table, "platform", platform))
+    if brand:
+        candidates.append(_containing_rows(table, "brand", brand.lower()))
+    if ram:
+        candidates.append(_equal_rows(table, "ram", ram))
+    if storage:
+        candidates.append(_equal_rows(table, "storage", storage))
+    if processor:
+        candidates.append(_containing_rows(table, "processor", processor))
+
+    if not candidates:
+        return np.arange(table["size"])
+
+    # Intersect smallest first so the cost follows the number of matches
+    candidates.sort(key=len)
+    rows = candidates[0]
+    for other in candidates[1:]:
+        if not len(rows):
+            break
+        rows = np.intersect1d(rows, other, assume_unique=True)
+    return rows
+
+
+def rows_to_results(table, rows):
+    results = []
+    platform_codes = table["columns"]["platform"]
+    for i in rows.tolist():
+        platform = table["platforms"][platform_codes[i]]
+        doc = table["products"][platform][table["positions"][i]]
+        results.append({
+            "platform": platform,
+            "product": doc.get("Product Name"),
+            "price": doc.get("Price"),
+            "ram": doc.get("RAM"),
+            "storage": doc.get("Storage"),
+            "processor": doc.get("Processor Series")
+        })
+    return results
@@ -1,90 +1,81 @@
+import asyncio
 from fastapi import FastAPI, Request
-from pymongo import MongoClient
 from genai_utils import get_llm_price_suggestion
-from web_utils import search_product_on_web
-import pandas as pd
+from web_utils import search_product_on_web_async
+from data_access import collections
+from metrics import instrument, span
+from query_parser import build_query_parser, parse_query
+from catalog_table import get_catalog_table, refresh_catalog_table, select_rows, rows_to_results
+from catalog_snapshot import snapshot_status
+from readiness import add_readiness, index_status
+import catalog_table
 
 app = FastAPI()
-
-client = MongoClient("mongodb://localhost:27017/")
-db = client["JSONS"]
-collections = ["reliance", "pai", "croma", "flipkart"]
-
-def normalize_ram(ram):
-    if not ram:
-        return ""
-    return str(ram).lower().replace(" ", "")
-
-def normalize_storage(storage):
-    if not storage:
-        return ""
-    return str(storage).lower().replace(" ", "")
-
-def normalize_processor(proc):
-    if not proc:
-        return ""
-    proc = proc.lower().replace(" ", "")
-    mapping = {
-        "i3": "i3", "corei3": "i3",
-        "i5": "i5", "corei5": "i5",
-        "i7": "i7", "corei7": "i7",
-        "i9": "i9", "corei9": "i9",
-        "ryzen5": "ryzen5", "ryzen7": "ryzen7"
-    }
-    return mapping.get(proc, proc)
+instrument(app, "chatbot")
+
+# Default vocabulary until the catalog vocabulary has been loaded
+query_parser = build_query_parser()
+query_parser_table = None
+query_parser_lock = asyncio.Lock()
+
+async def load_query_parser():
+    # Rebuild the matcher from the brands and processors present in the
+    # catalog, again whenever the catalog table has been rebuilt
+    global query_parser, query_parser_table
+    table = await get_catalog_table()
+    if query_parser_table is not table:
+        async with query_parser_lock:
+            if query_parser_table is not table:
+                vocabulary = table["vocabulary"]
+                query_parser = build_query_parser(vocabulary["brands"], vocabulary["processors"], collections)
+                query_parser_table = table
+    return query_parser
 
 def extract_components(query):
-    query = query.lower()
-    brand = next((b for b in ["dell", "hp", "asus", "acer", "apple"] if b in query), None)
-    ram = normalize_ram(next((r for r in ["8gb", "16gb", "32gb", "64gb"] if r in query.replace(" ", "")), None))
-    storage = normalize_storage(next((s for s in ["256gb", "512gb", "1tb", "2tb"] if s in query.replace(" ", "")), None))
-    processor = normalize_processor(next((p for p in ["i3", "i5", "i7", "i9", "ryzen5", "ryzen7"] if p in query.replace(" ", "")), None))
-    platform = next((p for p in collections if p in query), None)
-    return brand, ram, storage, processor, platform
-
-def get_price_from_db(brand, ram, storage, processor, platform=None):
-    results = []
-    search_collections = [platform] if platform else collections
-
-    for coll in search_collections:
-        docs = db[coll].find({}, {
-            "Product Name": 1,
-            "Price": 1,
-            "RAM": 1,
-            "Storage": 1,
-            "Processor Series": 1,
-            "Processor Type": 1,
-            "Brand": 1,
-            "_id": 0
-        })
-
-        for doc in docs:
-            match = True
-
-            if brand and brand.lower() not in str(doc.get("Brand", "")).lower():
-                match = False
-            if platform and coll != platform:
-                match = False
-            if ram and ram != normalize_ram(doc.get("RAM", "")):
-                match = False
-            if storage and storage != normalize_storage(doc.get("Storage", "")):
-                match = False
-            if processor:
-                processor_info = f"{doc.get('Processor Series', '')} {doc.get('Processor Type', '')}"
-                if processor not in normalize_processor(processor_info):
-                    match = False
-
-            if match:
-                results.append({
-                    "platform": coll,
-                    "product": doc.get("Product Name"),
-                    "price": doc.get("Price"),
-                    "ram": doc.get("RAM"),
-                    "storage": doc.get("Storage"),
-                    "processor": doc.get("Processor Series")
-                })
-
-    return results
+    found = parse_query(query_parser, query)
+    return found["brand"], found["ram"] or "", found["storage"] or "", found["processor"] or "", found["platform"]
+
+async def get_price_from_db(brand, ram, storage, processor, platform=None):
+    with span("get_price_from_db.table"):
+        table = await get_catalog_table()
+    with span("get_price_from_db.select"):
+        rows = select_rows(table, brand, ram, storage, processor, platform)
+    with span("get_price_from_db.materialize"):
+        return rows_to_results(table, rows)
+
+def format_db_results(db_results):
+    # Group by platform (alphabetical, rows in catalog order) without pandas
+    grouped = {}
+    for row in db_results:
+        grouped.setdefault(row["platform"], []).append(row)
+
+    response_lines = ["✅ Product found in our database:\n"]
+    for platform in sorted(grouped):
+        response_lines.append(f"🔸 **{platform.capitalize()}**")
+        for row in grouped[platform]:
+            response_lines.append(
+                f"• **Product:** {row['product']}\n"
+                f"  → ₹{row['price']}\n"
+                f"  RAM: {row['ram']} | Storage: {row['storage']} | Processor: {row['processor']}\n"
+            )
+    return "\n".join(response_lines)
+
+async def warm_up():
+    await load_query_parser()
+    brand, ram, storage, processor, platform = extract_components("dell 16gb 512gb i5 laptop price on flipkart")
+    format_db_results(await get_price_from_db(brand, ram, storage, processor, None))
+
+def describe_indexes():
+    return {"catalog_table": index_status(catalog_table._table), "catalog_snapshot": snapshot_status()}
+
+add_readiness(app, warm_up, describe_indexes)
+
+@app.post("/refresh_index")
+async def refresh_index():
+    # Re-reads the catalog after the collections have changed
+    table = await refresh_catalog_table()
+    await load_query_parser()
+    return {"indexed_products": table["size"], "built_at": table["built_at"]}
 
 @app.post("/chatbot")
 async def chatbot(request: Request):
@@ -93,26 +84,16 @@ async def chatbot(request: Request):
     if not query:
         return {"response": "⚠️ Please enter a valid query."}
 
+    await load_query_parser()
     brand, ram, storage, processor, platform = extract_components(query)
-    db_results = get_price_from_db(brand, ram, storage, processor, platform)
+    db_results = await get_price_from_db(brand, ram, storage, processor, platform)
 
     if db_results:
-        df = pd.DataFrame(db_results)
-        grouped = df.groupby("platform")
-        response_lines = ["✅ Product found in our database:\n"]
-        for platform, group in grouped:
-            response_lines.append(f"🔸 **{platform.capitalize()}**")
-            for _, row in group.iterrows():
-                response_lines.append(
-                    f"• **Product:** {row['product']}\n"
-                    f"  → ₹{row['price']}\n"
-                    f"  RAM: {row['ram']} | Storage: {row['storage']} | Processor: {row['processor']}\n"
-                )
-        return {"response": "\n".join(response_lines)}
+        return {"response": format_db_results(db_results)}
 
     if brand or processor or ram or storage:
         search_text = f"{brand or ''} {ram or ''} {storage or ''} {processor or ''} laptop"
-        web_results = search_product_on_web(search_text)
+        web_results = await search_product_on_web_async(search_text)
         if isinstance(web_results, list) and len(web_results) > 0:
             response_lines = ["🌐 Product not in our DB. Found using web search:\n"]
             for res in web_results[:3]:
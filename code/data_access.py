@@ -0,0 +1,62 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+load_dotenv()
+
+# Connection settings, shared by backend2 and chatbot_query
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_DB = os.getenv("MONGO_DB", "JSONS")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+
+collections = ["reliance", "pai", "croma", "flipkart"]
+
+client = MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE)
+
+# pymongo is blocking, so queries run on a thread pool sized to the connection pool
+_executor = ThreadPoolExecutor(max_workers=MONGO_MAX_POOL_SIZE, thread_name_prefix="mongo")
+
+
+def reconnect():
+    # New client and thread pool for a forked worker: neither pymongo's
+    # connections nor the pool's threads survive fork()
+    global client, _executor
+    client = MongoClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE)
+    _executor = ThreadPoolExecutor(max_workers=MONGO_MAX_POOL_SIZE, thread_name_prefix="mongo")
+
+
+def get_db():
+    return client[MONGO_DB]
+
+
+def set_client(new_client):
+    # Swap in another client, e.g. a mongomock stand-in for benchmarks
+    global client
+    client = new_client
+
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+def _find(coll, query, projection, sort=None):
+    # Copy the projection: callers share module-level dicts across threads
+    cursor = get_db()[coll].find(query, dict(projection) if projection else None)
+    if sort:
+        cursor = cursor.sort(sort)
+    return list(cursor)
+
+
+async def find(coll, query=None, projection=None, sort=None):
+    return await run_blocking(_find, coll, query or {}, projection, sort)
+
+
+async def find_in_collections(colls, query=None, projection=None, sort=None):
+    # Query every platform collection concurrently
+    docs = await asyncio.gather(*(find(coll, query, projection, sort) for coll in colls))
+    return dict(zip(colls, docs))
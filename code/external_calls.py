@@ -0,0 +1,235 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from functools import partial
+
+
+# HTTP statuses worth another attempt; other 4xx answers will not change
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def status_code(error):
+    # HTTP status of a client error: requests' HTTPError carries the response,
+    # google.api_core errors carry the status as .code
+    code = getattr(getattr(error, "response", None), "status_code", None)
+    if code is None:
+        code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_transient(error):
+    # Timeouts, connection errors and 429/5xx may clear on retry; invalid
+    # requests and errors in our own prompt or parsing code will not
+    if isinstance(error, (TimeoutError, FutureTimeoutError)):
+        return True
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUSES
+    # requests' ConnectionError and Timeout are OSErrors, like socket errors
+    return isinstance(error, OSError)
+
+
+class CircuitBreaker:
+    # closed -> open after `failure_threshold` consecutive failures; once
+    # `reset_timeout` has passed a single trial call is let through (half-open)
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        # Returns True when this call is the half-open trial
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self.trial_running):
+                raise CircuitOpenError("upstream is failing, not calling it for now")
+            if state == "half_open":
+                self.trial_running = True
+                return True
+            return False
+
+    def release_trial(self, trial):
+        # A trial that ended without a result (cancelled, consumer gone) lets
+        # the next call try again; after record_* this changes nothing
+        if trial:
+            with self._lock:
+                self.trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class ExternalService:
+    # Blocking upstream client calls run on a dedicated, bounded thread pool
+    # with a timeout, jittered retries and a circuit breaker, so a slow or
+    # dead upstream cannot take the request threads or the event loop with it.
+    # The timeout only stops the wait: callers also hand it to the client as
+    # the transport timeout, so a hung call frees its pool thread too
+    def __init__(self, name, max_concurrency=8, timeout=10.0, retries=2, backoff=0.2,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=name)
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.inflight = 0
+
+    def _semaphore(self):
+        # asyncio semaphores belong to one event loop
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _delay(self, attempt):
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _failed(self, error, attempt):
+        # Returns the error to raise, or None to retry. Only transient errors
+        # count against the breaker and are retried
+        if isinstance(error, (asyncio.TimeoutError, FutureTimeoutError)):
+            error = TimeoutError(f"{self.name} call timed out after {self.timeout}s")
+        if not is_transient(error):
+            return error
+        self.breaker.record_failure()
+        if attempt == self.retries:
+            return error
+        print(f"⚠️ {self.name} call failed ({type(error).__name__}: {error}), retrying")
+        return None
+
+    def _submit(self, fn, args, kwargs):
+        # The caller's context (e.g. the request profile) follows the call
+        return self._executor.submit(copy_context().run, partial(fn, *args, **kwargs))
+
+    async def call(self, fn, *args, **kwargs):
+        async with self._semaphore():
+            for attempt in range(self.retries + 1):
+                trial = self.breaker.before_call()
+                self.inflight += 1
+                try:
+                    future = asyncio.wrap_future(self._submit(fn, args, kwargs))
+                    result = await asyncio.wait_for(future, self.timeout)
+                except Exception as e:
+                    error = self._failed(e, attempt)
+                    if error is not None:
+                        raise error
+                else:
+                    self.breaker.record_success()
+                    return result
+                finally:
+                    self.inflight -= 1
+                    self.breaker.release_trial(trial)
+                await asyncio.sleep(self._delay(attempt))
+
+    async def stream(self, fn, *args, **kwargs):
+        # Iterates the blocking iterator returned by fn on the pool. The timeout
+        # bounds the wait for each item; a stream that has started is not retried
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        finished = object()
+        stopped = threading.Event()
+
+        def put(item, error=None):
+            if not stopped.is_set():
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    put(item)
+            except Exception as e:
+                put(finished, e)
+            else:
+                put(finished)
+
+        async with self._semaphore():
+            trial = self.breaker.before_call()
+            self.inflight += 1
+            self._submit(produce, (), {})
+            try:
+                while True:
+                    try:
+                        item, error = await asyncio.wait_for(queue.get(), self.timeout)
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(f"{self.name} stream stalled for {self.timeout}s")
+                    if item is finished:
+                        if error is not None:
+                            raise error
+                        break
+                    yield item
+            except Exception as e:
+                if is_transient(e):
+                    self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+            finally:
+                # Also reached when the consumer goes away mid-stream
+                stopped.set()
+                self.inflight -= 1
+                self.breaker.release_trial(trial)
+
+    def call_sync(self, fn, *args, **kwargs):
+        # Same policy for callers that are already on a worker thread
+        with self._slots:
+            for attempt in range(self.retries + 1):
+                trial = self.breaker.before_call()
+                self.inflight += 1
+                try:
+                    result = self._submit(fn, args, kwargs).result(self.timeout)
+                except Exception as e:
+                    error = self._failed(e, attempt)
+                    if error is not None:
+                        raise error
+                else:
+                    self.breaker.record_success()
+                    return result
+                finally:
+                    self.inflight -= 1
+                    self.breaker.release_trial(trial)
+                time.sleep(self._delay(attempt))
+
+    def stats(self):
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "inflight": self.inflight,
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout
+        }
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import Counter
+from itertools import product
+from catalog_snapshot import load_products
+from spec_index import normalize_value
+
+# Response key -> document field
+FACET_FIELDS = {
+    "brands": "Brand",
+    "rams": "RAM",
+    "storages": "Storage",
+    "processor_types": "Processor Type",
+    "processor_series": "Processor Series"
+}
+
+FACET_PROJECTION = {"_id": 0, **{field: 1 for field in FACET_FIELDS.values()}}
+
+_index = None
+_build_lock = asyncio.Lock()
+
+
+def _selection_keys(doc):
+    # Every partial (brand, ram, storage) selection the document satisfies;
+    # None means "not selected"
+    brand = normalize_value(doc.get("Brand"))
+    ram = normalize_value(doc.get("RAM"))
+    storage = normalize_value(doc.get("Storage"))
+    return set(product((None, brand), (None, ram), (None, storage)))
+
+
+def _update(index, doc, delta):
+    for key in _selection_keys(doc):
+        counts = index["counts"].setdefault(key, {name: Counter() for name in FACET_FIELDS})
+        for name, field in FACET_FIELDS.items():
+            value = doc.get(field)
+            if value is None:
+                continue
+            # Collapse dump variants such as "512 GB " and "512 GB"
+            value = str(value).strip()
+            counts[name][value] += delta
+            if counts[name][value] <= 0:
+                del counts[name][value]
+        index["sorted"].pop(key, None)
+    index["size"] += delta
+    index["updated_at"] = time.time()
+
+
+def build_facet_index(products_by_coll):
+    index = {"counts": {}, "sorted": {}, "size": 0, "built_at": time.time(), "updated_at": time.time()}
+    for products in products_by_coll.values():
+        for doc in products:
+            _update(index, doc, 1)
+    return index
+
+
+def add_document(doc):
+    if _index is not None:
+        _update(_index, doc, 1)
+
+
+def remove_document(doc):
+    if _index is not None:
+        _update(_index, doc, -1)
+
+
+async def get_facet_index():
+    if _index is None:
+        async with _build_lock:
+            if _index is None:
+                await refresh_facet_index()
+    return _index
+
+
+async def refresh_facet_index(products_by_coll=None):
+    global _index
+    if products_by_coll is None:
+        products_by_coll = await load_products(FACET_PROJECTION)
+    _index = build_facet_index(products_by_coll)
+    return _index
+
+
+def lookup_facets(index, brand=None, ram=None, storage=None):
+    key = tuple(normalize_value(v) if v else None for v in (brand, ram, storage))
+    facets = index["sorted"].get(key)
+    if facets is None:
+        counts = index["counts"].get(key)
+        if not counts:
+            return {name: [] for name in FACET_FIELDS}
+        # Sorted option lists are cached until a document under this selection changes
+        facets = {name: sorted(counts[name], key=str) for name in FACET_FIELDS}
+        index["sorted"][key] = facets
+    return {name: list(values) for name, values in facets.items()}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from genai_utils import SuggestionParser, parse_suggestions, stream_llm_price_suggestion
+
+# Background GenAI suggestions started by /search; jobs live in the worker
+# that started them and are forgotten GENAI_JOB_TTL seconds after finishing
+GENAI_JOB_TTL = int(os.getenv("GENAI_JOB_TTL", "600"))
+
+_jobs = {}
+
+
+def _expire_jobs():
+    now = time.time()
+    for job_id in [job_id for job_id, job in _jobs.items() if job["finished_at"] and now - job["finished_at"] > GENAI_JOB_TTL]:
+        del _jobs[job_id]
+
+
+def _notify(job):
+    # Wakes everyone waiting on the job; later waiters get a fresh event
+    changed, job["changed"] = job["changed"], asyncio.Event()
+    changed.set()
+
+
+async def _run(job, chunks):
+    try:
+        async for chunk in chunks:
+            job["chunks"].append(chunk)
+            _notify(job)
+        job["status"] = "done"
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+        raise
+    except Exception as e:
+        print("🔥 GenAI Error:", e)
+        job["status"] = "error"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = time.time()
+        _notify(job)
+
+
+def start_genai_job(brand, ram, storage, processor_series, platform_prices):
+    _expire_jobs()
+    job = {
+        "id": uuid.uuid4().hex, "status": "pending", "chunks": [], "error": None,
+        "created_at": time.time(), "finished_at": None, "changed": asyncio.Event()
+    }
+    chunks = stream_llm_price_suggestion(brand, ram, storage, processor_series, platform_prices)
+    job["task"] = asyncio.ensure_future(_run(job, chunks))
+    _jobs[job["id"]] = job
+    return job
+
+
+def get_genai_job(job_id):
+    return _jobs.get(job_id)
+
+
+def cancel_genai_job(job):
+    # Marked finished here: a task cancelled before it first runs never reaches _run's finally
+    if job["finished_at"] is None:
+        job["task"].cancel()
+        job["status"] = "cancelled"
+        job["finished_at"] = time.time()
+        _notify(job)
+
+
+async def wait_genai_job(job, timeout):
+    # Returns once the job has finished or `timeout` seconds have passed
+    deadline = time.monotonic() + timeout
+    while job["finished_at"] is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        try:
+            await asyncio.wait_for(job["changed"].wait(), remaining)
+        except asyncio.TimeoutError:
+            return
+
+
+def genai_job_result(job):
+    # Same fields as /genai_suggestions once the job is done
+    body = {"job_id": job["id"], "status": job["status"]}
+    if job["status"] == "done":
+        text = "".join(job["chunks"])
+        structured, strategy = parse_suggestions(text)
+        body.update({"text": text, "structured": structured, "strategy": strategy})
+    elif job["status"] in ("error", "cancelled"):
+        body["detail"] = f"⚠️ GenAI Error: {job['error']}" if job["error"] else "GenAI suggestion was cancelled"
+    return body
+
+
+async def follow_genai_job(job):
+    # Every chunk of the job from the beginning, then new ones as they arrive
+    sent = 0
+    while True:
+        changed = job["changed"]
+        while sent < len(job["chunks"]):
+            yield job["chunks"][sent]
+            sent += 1
+        if job["finished_at"] is not None:
+            if job["status"] != "done":
+                raise RuntimeError(job["error"] or "GenAI suggestion was cancelled")
+            return
+        await changed.wait()
+
+
+async def suggestion_events(chunks):
+    # NDJSON events: one "suggestion" per platform block as soon as the model
+    # has finished writing it, then "done" with the full text and strategy notes
+    parser = SuggestionParser()
+    text = ""
+    try:
+        async for chunk in chunks:
+            text += chunk
+            for block in parser.feed(chunk):
+                yield json.dumps({"type": "suggestion", **block}, ensure_ascii=False) + "\n"
+    except Exception as e:
+        print("🔥 GenAI Error:", e)
+        yield json.dumps({"type": "error", "detail": f"⚠️ GenAI Error: {e}"}, ensure_ascii=False) + "\n"
+        return
+    for block in parser.close():
+        yield json.dumps({"type": "suggestion", **block}, ensure_ascii=False) + "\n"
+    yield json.dumps({"type": "done", "text": text, "strategy": parser.strategy_notes.strip()}, ensure_ascii=False) + "\n"
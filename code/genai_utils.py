@@ -1,18 +1,92 @@
+import asyncio
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
+from cache_utils import MISSING, LRUCache
+from metrics import span
+from external_calls import ExternalService
+from price_history import PRICE_WINDOW_DAYS, spec_trends
 
 load_dotenv()
 
-# ✅ Corrected environment variable usage
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+GENAI_MODEL_NAME = "models/gemini-1.5-pro-latest"
 
-# ✅ Use a model that works with the public API
-model = genai.GenerativeModel("models/gemini-1.5-pro-latest")
+# Suggestion cache keyed on the canonicalized prompt inputs
+GENAI_CACHE_TTL = int(os.getenv("GENAI_CACHE_TTL", "3600"))
+GENAI_CACHE_SIZE = int(os.getenv("GENAI_CACHE_SIZE", "512"))
+suggestion_cache = LRUCache(maxsize=GENAI_CACHE_SIZE, ttl=GENAI_CACHE_TTL)
 
+# Gemini calls: bounded pool, per-call timeout, retries and a circuit breaker
+gemini = ExternalService(
+    "gemini",
+    max_concurrency=int(os.getenv("GENAI_MAX_CONCURRENCY", "4")),
+    timeout=float(os.getenv("GENAI_TIMEOUT", "30")),
+    retries=int(os.getenv("GENAI_RETRIES", "1")),
+    backoff=1.0
+)
+# A streamed answer may take longer overall than one item is allowed to
+GENAI_STREAM_TIMEOUT = float(os.getenv("GENAI_STREAM_TIMEOUT", "120"))
 
-def get_llm_price_suggestion(brand, ram, storage, processor, platform_prices):
-    prompt = f"""
+model = None
+_inflight = {}
+
+
+def get_model():
+    # Gemini is configured on first use so a fake model can be plugged in offline
+    global model
+    if model is None:
+        import google.generativeai as genai
+        # ✅ Corrected environment variable usage
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        # ✅ Use a model that works with the public API
+        model = genai.GenerativeModel(GENAI_MODEL_NAME)
+    return model
+
+
+def set_model(new_model):
+    # Any object with generate_content(prompt, stream=False, request_options=None)
+    # -> response with .text
+    global model
+    model = new_model
+    suggestion_cache.clear()
+
+
+def suggestion_cache_key(brand, ram, storage, processor, platform_prices, trends=None):
+    def canon(value):
+        return " ".join(str(value or "").lower().split())
+
+    # The prompt quotes the price history, so new observations make a new key
+    history = hashlib.sha1(json.dumps(trends or {}, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return json.dumps([
+        canon(brand), canon(ram), canon(storage), canon(processor),
+        sorted((canon(k), str(v)) for k, v in (platform_prices or {}).items()),
+        history
+    ])
+
+
+def get_genai_cache_stats():
+    return {**suggestion_cache.stats(), "inflight": len(_inflight), "gemini": gemini.stats()}
+
+
+def price_history_lines(trends):
+    lines = []
+    for platform, stats in trends.items():
+        line = f"{platform.capitalize()}: trend ₹{stats['ewma']:,.0f}, range ₹{stats['window_min']:,.0f}–₹{stats['window_max']:,.0f} over the last {PRICE_WINDOW_DAYS:g} days"
+        if stats["vs_trend"] is not None:
+            line += f", current price {abs(stats['vs_trend']):.1%} {'above' if stats['vs_trend'] >= 0 else 'below'} trend"
+        if stats["discount_depth"] is not None:
+            line += f", typically {stats['discount_depth']:.0%} off MRP"
+        lines.append(line)
+    return lines
+
+
+def build_prompt(brand, ram, storage, processor, platform_prices, trends=None):
+    if trends is None:
+        trends = spec_trends(brand, ram, storage, processor)
+    history = price_history_lines(trends)
+    history = "\nPrice history of this product (EWMA trend, min/max, discount depth):\n" + "\n".join(history) + "\n" if history else ""
+    return f"""
 You are a pricing assistant AI.
 
 A vendor wants to list the following product:
@@ -23,13 +97,13 @@ Processor: {processor}
 
 Here are the prices of the same/similar product on other platforms:
 {chr(10).join([f"{k.capitalize()}: ₹{v}" for k, v in platform_prices.items()])}
-
+{history}
 Some platforms are missing this product.
 
 ✅ Your task:
 - Suggest a selling price for each **missing** platform.
 - For **each price**, explain clearly why you recommended that amount.
-- Consider market trends, brand tier, pricing patterns, and platform factors.
+- Consider market trends (use the price history when given), brand tier, pricing patterns, and platform factors.
 - Always write in this format:
 
 📌 Flipkart → ₹57,000(Don't use exact number as in the example , use the platform prices and consider and all products specs and give the pricing and resoning in accordance to it.)  
@@ -41,9 +115,140 @@ Reason: Higher due to premium platform and product visibility...
 ⚠️ Do not skip the 'Reason' part.
 """
 
+
+def _generate_text(prompt):
+    # The transport timeout ends the pool thread when Gemini hangs
+    return get_model().generate_content(prompt, request_options={"timeout": gemini.timeout}).text
+
+
+def _generate(key, prompt):
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        with span("genai.generate"):
+            text = gemini.call_sync(_generate_text, prompt)
     except Exception as e:
         print("🔥 GenAI Error:", e)
         return f"⚠️ GenAI Error: {e}"
+    # Only successful answers are cached
+    suggestion_cache.set(key, text)
+    return text
+
+
+async def _generate_async(key, prompt):
+    try:
+        with span("genai.generate"):
+            text = await gemini.call(_generate_text, prompt)
+    except Exception as e:
+        print("🔥 GenAI Error:", e)
+        return f"⚠️ GenAI Error: {e}"
+    suggestion_cache.set(key, text)
+    return text
+
+
+def get_llm_price_suggestion(brand, ram, storage, processor, platform_prices):
+    trends = spec_trends(brand, ram, storage, processor)
+    key = suggestion_cache_key(brand, ram, storage, processor, platform_prices, trends)
+    with span("genai.cache"):
+        cached = suggestion_cache.get(key)
+    if cached is not MISSING:
+        return cached
+    return _generate(key, build_prompt(brand, ram, storage, processor, platform_prices, trends))
+
+
+async def get_llm_price_suggestion_async(brand, ram, storage, processor, platform_prices):
+    trends = spec_trends(brand, ram, storage, processor)
+    key = suggestion_cache_key(brand, ram, storage, processor, platform_prices, trends)
+    with span("genai.cache"):
+        cached = suggestion_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    # Concurrent identical requests share one upstream call
+    task = _inflight.get(key)
+    if task is None:
+        prompt = build_prompt(brand, ram, storage, processor, platform_prices, trends)
+        task = asyncio.ensure_future(_generate_async(key, prompt))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    with span("genai.wait"):
+        return await asyncio.shield(task)
+
+
+async def stream_llm_price_suggestion(brand, ram, storage, processor, platform_prices):
+    # Yields the model's text as it is generated; a cached answer comes as one chunk
+    trends = spec_trends(brand, ram, storage, processor)
+    key = suggestion_cache_key(brand, ram, storage, processor, platform_prices, trends)
+    with span("genai.cache"):
+        cached = suggestion_cache.get(key)
+    if cached is not MISSING:
+        yield cached
+        return
+
+    parts = []
+    async for text in gemini.stream(_stream_text, build_prompt(brand, ram, storage, processor, platform_prices, trends)):
+        parts.append(text)
+        yield text
+    suggestion_cache.set(key, "".join(parts))
+
+
+def _stream_text(prompt):
+    for chunk in get_model().generate_content(prompt, stream=True, request_options={"timeout": GENAI_STREAM_TIMEOUT}):
+        if chunk.text:
+            yield chunk.text
+
+
+STRATEGY_KEYWORDS = ["logic", "strategy", "how", "pricing"]
+
+
+class SuggestionParser:
+    # Incremental parser for the "📌 Platform → ₹price" blocks of a suggestion.
+    # feed() returns the blocks completed by a chunk of text: a block ends when
+    # the next 📌 line starts, and the last one when close() is called
+    def __init__(self):
+        self.buffer = ""
+        self.current = None
+        self.strategy_notes = ""
+
+    def feed(self, text):
+        self.buffer += text
+        *lines, self.buffer = self.buffer.split("\n")
+        return [block for line in lines for block in self._line(line)]
+
+    def close(self):
+        blocks = self._line(self.buffer) if self.buffer.strip() else []
+        self.buffer = ""
+        return blocks + self._finish()
+
+    def _line(self, line):
+        line = line.strip()
+        if line.startswith("📌"):
+            blocks = self._finish()
+            parts = line.split("\u2192")
+            if len(parts) >= 2:
+                self.current = {"parts": parts, "reason": ""}
+            return blocks
+        if self.current is not None:
+            self.current["reason"] += line + " "
+        elif any(keyword in line.lower() for keyword in STRATEGY_KEYWORDS):
+            self.strategy_notes += line + "\n"
+        return []
+
+    def _finish(self):
+        if self.current is None:
+            return []
+        parts, reason = self.current["parts"], self.current["reason"].strip()
+        self.current = None
+        platform = parts[0].replace("📌", "").strip()
+        price_line = f"{platform} → ₹{parts[1].strip()}"
+        return [{
+            "platform": platform,
+            "price": parts[1].strip().replace("₹", ""),
+            "reason": reason,
+            "formatted": f"📌 {price_line}\n{reason}"
+        }]
+
+
+def parse_suggestions(text):
+    # (structured blocks, strategy notes) of a complete suggestion text
+    parser = SuggestionParser()
+    structured = parser.feed(text.strip()) + parser.close()
+    return structured, parser.strategy_notes.strip()
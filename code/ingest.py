@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pymongo import ASCENDING, UpdateOne
+from data_access import get_db
+from price_history import PRICE_HISTORY_PATH, PriceHistory
+from spec_index import candidate_query, shadow_fields
+
+# Run from the code/ directory: python ingest.py [--drop] [--batch-size N] [--observed-at DATE] [platform=path ...]
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data")
+DATA_FILES = {
+    "reliance": "reliance_json (1).json",
+    "pai": "csvjson (1).json",
+    "croma": "croma_json (1).json",
+    "flipkart": "flipkart_storage_edit (1).json"
+}
+
+# Fields that identify a listing; price fields may change between dumps
+IDENTITY_FIELDS = ["Product Name", "Brand", "RAM", "Storage", "Processor Series", "Processor Type"]
+
+INDEXES = [
+    ([("_key", ASCENDING)], {"unique": True}),
+    # Serve the equality branches of spec_index.candidate_query
+    ([("brand_lc", ASCENDING), ("ram_lc", ASCENDING), ("storage_lc", ASCENDING), ("processor_series_lc", ASCENDING)], {}),
+    ([("brand_lc", ASCENDING), ("ram_lc", ASCENDING), ("storage_lc", ASCENDING), ("processor_type_lc", ASCENDING)], {}),
+    ([("ram_lc", ASCENDING), ("storage_lc", ASCENDING), ("processor_series_lc", ASCENDING)], {})
+]
+
+PROCESSOR_PATTERNS = [
+    (re.compile(r"ultra\s*(\d)"), "ultra{0}"),
+    (re.compile(r"(?<![a-z0-9])(?:core\s*)?i\s*([3579])(?![0-9])"), "i{0}"),
+    (re.compile(r"ryzen\s*([a-z]?\d)"), "ryzen{0}"),
+    (re.compile(r"(?<![a-z0-9])m\s*(\d)(?:\s*(pro|max))?"), "m{0}{1}"),
+    (re.compile(r"snapdragon\s*x\s*(elite|plus)"), "snapdragonx{0}"),
+    (re.compile(r"(celeron|pentium|athlon|mediatek)"), "{0}")
+]
+
+_SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(gb|tb)")
+
+
+# Used by calibrate_factors to group listings into configurations
+def size_gb(value):
+    # "16 GB" -> 16, "1 TB" -> 1024; None when no size is present
+    match = _SIZE_PATTERN.search(str(value or "").lower())
+    if not match:
+        return None
+    size = float(match.group(1)) * (1024 if match.group(2) == "tb" else 1)
+    return int(size)
+
+
+def processor_family(series, processor_type=None):
+    text = str(series or "").lower()
+    for pattern, template in PROCESSOR_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return template.format(*(group or "" for group in match.groups()))
+    fallback = re.sub(r"\s+", "", text) or re.sub(r"\s+", "", str(processor_type or "").lower())
+    return fallback or None
+
+
+def canonicalize(doc):
+    # Only the fields a query reads: the lowercase shadow fields behind
+    # spec_index.candidate_query and its compound indexes
+    doc.update(shadow_fields(doc))
+    return doc
+
+
+def iter_json_array(fp, chunk_size=1 << 16):
+    # Incrementally decode the objects of a top-level JSON array, holding at
+    # most one object plus one chunk in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        separators = " \t\r\n," if started else " \t\r\n"
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            fill()
+            continue
+
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected '[' at the start of the JSON array")
+            started = True
+            position += 1
+            continue
+
+        if buffer[position] == "]":
+            return
+        if buffer[position] != "{":
+            raise ValueError(f"Expected an object in the JSON array, found {buffer[position]!r}")
+
+        try:
+            doc, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        position = end
+        yield doc
+
+
+def listing_key(coll, doc, seen):
+    # Stable id for upserts: the listing identity plus its occurrence number,
+    # so identical listings with different prices stay separate documents
+    identity = json.dumps([coll] + [doc.get(field) for field in IDENTITY_FIELDS], ensure_ascii=False, default=str)
+    occurrence = seen.get(identity, 0)
+    seen[identity] = occurrence + 1
+    return hashlib.sha1(f"{identity}#{occurrence}".encode("utf-8")).hexdigest()
+
+
+def ingest_file(db, coll, path, batch_size=1000, drop=False, history=None, observed_at=None):
+    if drop:
+        db[coll].drop()
+    for keys, options in INDEXES:
+        db[coll].create_index(keys, **options)
+
+    seen = {}
+    batch = []
+    counts = {"read": 0, "upserted": 0, "modified": 0, "price_changes": 0}
+
+    def flush():
+        if batch:
+            result = db[coll].bulk_write(batch, ordered=False)
+            counts["upserted"] += result.upserted_count
+            counts["modified"] += result.modified_count
+            batch.clear()
+        if history is not None:
+            history.commit()
+
+    with open(path, encoding="utf-8-sig") as fp:
+        for doc in iter_json_array(fp):
+            doc = canonicalize(doc)
+            doc["_key"] = listing_key(coll, doc, seen)
+            batch.append(UpdateOne({"_key": doc["_key"]}, {"$set": doc}, upsert=True))
+            if history is not None and history.record(coll, doc["_key"], doc, observed_at):
+                counts["price_changes"] += 1
+            counts["read"] += 1
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+    return counts
+
+
+def plan_stages(plan):
+    # Every stage name in an explain() plan tree
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages += plan_stages(value)
+    return stages
+
+
+def explain_spec_query(db, coll):
+    # Winning plan of a spec lookup for one of the collection's own products
+    doc = db[coll].find_one({"brand_lc": {"$exists": True}})
+    if doc is None:
+        return None
+    query = candidate_query(doc.get("Brand"), doc.get("RAM"), doc.get("Storage"), doc.get("Processor Series"))
+    return plan_stages(db[coll].find(query).explain()["queryPlanner"]["winningPlan"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the platform dumps into MongoDB with indexed spec fields")
+    parser.add_argument("sources", nargs="*", help="platform=path pairs; defaults to the dumps in Data/")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--drop", action="store_true", help="drop each collection before loading")
+    parser.add_argument("--explain", action="store_true", help="only check that spec lookups use an index")
+    parser.add_argument("--observed-at", help="ISO date the dumps were taken, for backfilling price history in order")
+    parser.add_argument("--no-history", action="store_true", help="do not record prices in the price history")
+    args = parser.parse_args()
+
+    if args.sources:
+        sources = dict(source.split("=", 1) for source in args.sources)
+    else:
+        sources = {coll: os.path.join(DATA_DIR, filename) for coll, filename in DATA_FILES.items()}
+
+    db = get_db()
+    if args.explain:
+        ok = True
+        for coll in sources:
+            stages = explain_spec_query(db, coll)
+            if stages is None:
+                print(f"⚠️ {coll}: no ingested documents to explain")
+            elif "COLLSCAN" in stages or "IXSCAN" not in stages:
+                ok = False
+                print(f"❌ {coll}: {' -> '.join(stages)}")
+            else:
+                print(f"✅ {coll}: {' -> '.join(stages)}")
+        raise SystemExit(0 if ok else 1)
+
+    history = None if args.no_history or not PRICE_HISTORY_PATH else PriceHistory(PRICE_HISTORY_PATH)
+    observed_at = datetime.fromisoformat(args.observed_at).timestamp() if args.observed_at else None
+
+    for coll, path in sources.items():
+        counts = ingest_file(db, coll, path, batch_size=args.batch_size, drop=args.drop, history=history, observed_at=observed_at)
+        print(f"✅ {coll}: {counts['read']} read, {counts['upserted']} inserted, {counts['modified']} updated, {counts['price_changes']} price changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import time
+import numpy as np
+from similarity_index import BRAND_TIERS, PROCESSOR_FAMILIES, feature_vector
+from spec_index import normalize_value
+
+# Ridge regression of log2 price on the similarity index features (RAM,
+# storage, processor tier and generation, brand tier), processor family,
+# brand and platform. Trained in one solve over the catalog and used for the
+# default /genai_suggestions answer; Gemini is only asked when the caller opts in
+LOCAL_MODEL_ALPHA = float(os.getenv("LOCAL_MODEL_ALPHA", "10"))
+
+# Similarity feature columns used as regressors; the last one is log2 price
+NUMERIC_COLUMNS = [0, 1, 2, 3, 4]
+PRICE_COLUMN = 5
+
+TIER_NAMES = {code: tier for tier, code in BRAND_TIERS.items()}
+
+_model = None
+
+
+def _one_hot(codes, size):
+    # Code -1 (unknown) is a row of zeros
+    return np.eye(size + 1)[codes][:, :size]
+
+
+def _design(model, numeric, families, brands, platforms):
+    missing = np.isnan(numeric)
+    return np.hstack([
+        np.where(missing, model["means"], numeric), missing,
+        _one_hot(families, len(PROCESSOR_FAMILIES)),
+        _one_hot(brands, len(model["brands"])),
+        _one_hot(platforms, len(model["platforms"]))
+    ])
+
+
+def train_local_model(similarity, alpha=LOCAL_MODEL_ALPHA):
+    start = time.perf_counter()
+    platforms = list(similarity["colls"])
+    numeric, families, brands, platform_ids, y = [], [], [], [], []
+    for platform_id, entry in enumerate(similarity["colls"].values()):
+        priced = np.isfinite(entry["features"][:, PRICE_COLUMN])
+        numeric.append(entry["features"][priced][:, NUMERIC_COLUMNS].astype(np.float64))
+        families.append(entry["families"][priced].astype(np.int64))
+        brands.append(entry["brands"][priced].astype(np.int64))
+        platform_ids.append(np.full(int(priced.sum()), platform_id, dtype=np.int64))
+        y.append(entry["features"][priced, PRICE_COLUMN].astype(np.float64))
+    numeric, families, brands, platform_ids, y = (np.concatenate(values) for values in (numeric, families, brands, platform_ids, y))
+
+    model = {
+        "products": similarity["products"], "brand_tier": similarity["brand_tier"],
+        "brands": similarity["brands"], "platforms": platforms,
+        "means": np.nan_to_num(np.nanmean(numeric, axis=0)) if len(y) else np.zeros(len(NUMERIC_COLUMNS))
+    }
+    X = _design(model, numeric, families, brands, platform_ids)
+
+    # Centred so the intercept is not penalised
+    x_mean, y_mean = X.mean(axis=0) if len(y) else np.zeros(X.shape[1]), y.mean() if len(y) else 0.0
+    Xc = X - x_mean
+    coef = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(X.shape[1]), Xc.T @ (y - y_mean))
+    residuals = y - y_mean - Xc @ coef
+
+    model.update({
+        "coef": coef, "intercept": y_mean - x_mean @ coef,
+        "listings": int(len(y)),
+        "rmse_log2": float(np.sqrt((residuals ** 2).mean())) if len(y) else 0.0,
+        "train_seconds": round(time.perf_counter() - start, 3),
+        "trained_at": time.time()
+    })
+    return model
+
+
+def get_local_model(similarity):
+    # Retrained whenever the similarity index is rebuilt over a new catalog read
+    global _model
+    if _model is None or _model["products"] is not similarity["products"]:
+        _model = train_local_model(similarity)
+    return _model
+
+
+def predict_log2(model, brand, ram, storage, processor_series):
+    # platform -> predicted log2 price of the spec
+    query, family = feature_vector(brand, ram, storage, processor_series, model["brand_tier"])
+    count = len(model["platforms"])
+    numeric = np.repeat(query[NUMERIC_COLUMNS].astype(np.float64)[None, :], count, axis=0)
+    brand_code = model["brands"].get(normalize_value(brand), -1)
+    X = _design(model, numeric, np.full(count, family), np.full(count, brand_code), np.arange(count))
+    return dict(zip(model["platforms"], X @ model["coef"] + model["intercept"])), query
+
+
+def _price(value):
+    try:
+        value = float(str(value).replace(",", "").replace("₹", ""))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def suggest_locally(model, brand, ram, storage, processor_series, platforms, observed_prices=None):
+    # Same fields as /genai_suggestions. observed_prices (platform -> prices of
+    # this spec) anchor the prediction: the model then only supplies how the
+    # missing platform prices comparable listings relative to those platforms
+    predicted, query = predict_log2(model, brand, ram, storage, processor_series)
+    observed = {}
+    for platform, prices in (observed_prices or {}).items():
+        prices = [price for price in map(_price, prices if isinstance(prices, list) else [prices]) if price]
+        if prices and platform in predicted:
+            observed[platform] = prices
+
+    residual, anchor = 0.0, None
+    if observed:
+        logs = [(np.log2(price), predicted[platform]) for platform, prices in observed.items() for price in prices]
+        residual = float(np.mean([actual - expected for actual, expected in logs]))
+        anchor = float(np.mean([2 ** expected for _, expected in logs]))
+        average = float(np.mean([price for prices in observed.values() for price in prices]))
+        names = ", ".join(platform.capitalize() for platform in observed)
+
+    tier = TIER_NAMES.get(query[4], "unknown")
+    error = round((2 ** model["rmse_log2"] - 1) * 100)
+    lines = [f"Pricing logic: ridge regression on log price over RAM, storage, processor, brand and platform, trained on {model['listings']:,} catalog listings."]
+    for platform in platforms:
+        if platform not in predicted:
+            continue
+        price = round(2 ** (predicted[platform] + residual), -2)
+        if anchor is not None:
+            change = 2 ** predicted[platform] / anchor - 1
+            relation = "at about the same price" if abs(change) < 0.005 else f"{abs(change):.0%} {'above' if change > 0 else 'below'} that"
+            reason = f"This configuration averages ₹{average:,.0f} on {names}; comparable listings sell {relation} on {platform.capitalize()}."
+        else:
+            reason = (
+                f"Predicted from catalog listings with {ram} RAM, {storage} storage and a {processor_series} processor "
+                f"({tier} brand tier) on {platform.capitalize()}; typical error ±{error}%."
+            )
+        lines.append(f"📌 {platform.capitalize()} → ₹{price:,.0f}\n{reason}")
+    return "\n".join(lines)
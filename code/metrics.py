@@ -0,0 +1,144 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+
+# Upper bounds in seconds, from in-memory lookups up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Header that turns on the per-request stage breakdown (returned as Server-Timing)
+PROFILE_HEADER = "x-profile"
+
+_profile = contextvars.ContextVar("profile", default=None)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                pairs = list(zip(self.label_names, labels))
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f"{self.name}_bucket{_labels(pairs + [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_labels(pairs)} {series['sum']}")
+                lines.append(f"{self.name}_count{_labels(pairs)} {series['count']}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _labels(pairs):
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+# Callables returning {(cache, tier): {"size", "hits", "misses"}}, rendered on /metrics
+_cache_sources = []
+
+CACHE_METRICS = [
+    ("cache_hits_total", "counter", "hits", "Cache lookups answered from the cache"),
+    ("cache_misses_total", "counter", "misses", "Cache lookups that missed"),
+    ("cache_entries", "gauge", "size", "Entries currently cached")
+]
+
+
+def register_cache_stats(source):
+    _cache_sources.append(source)
+
+
+def render_cache_stats():
+    series = {}
+    for source in _cache_sources:
+        series.update(source())
+    if not series:
+        return []
+    lines = []
+    for name, kind, field, help_text in CACHE_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (cache, tier), stats in sorted(series.items()):
+            lines.append(f"{name}{_labels([('cache', cache), ('tier', tier)])} {stats[field]}")
+    return lines
+
+
+stage_seconds = Histogram("price_stage_duration_seconds", "Time spent in each request stage", ["stage"])
+request_seconds = Histogram("http_request_duration_seconds", "Time to produce an HTTP response", ["app", "method", "path", "status"])
+
+
+@contextmanager
+def span(stage):
+    # Times a stage into the histogram and, when the request asked for it,
+    # into its profile; asyncio.to_thread carries the profile into workers
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe((stage,), elapsed)
+        profile = _profile.get()
+        if profile is not None:
+            profile.append((stage, elapsed))
+
+
+def render_metrics():
+    return "\n".join(stage_seconds.render() + request_seconds.render() + render_cache_stats()) + "\n"
+
+
+def server_timing(profile, total):
+    # Repeated stages are summed, in first-seen order
+    durations = {}
+    for stage, elapsed in profile:
+        durations[stage] = durations.get(stage, 0.0) + elapsed
+    entries = [f"{stage};dur={elapsed * 1000:.3f}" for stage, elapsed in durations.items()]
+    return ", ".join(entries + [f"total;dur={total * 1000:.3f}"])
+
+
+def instrument(app, app_name):
+    # Request histogram, opt-in X-Profile breakdown and GET /metrics on a FastAPI app
+    @app.middleware("http")
+    async def record_request(request: Request, call_next):
+        profile = [] if request.headers.get(PROFILE_HEADER) else None
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _profile.reset(token)
+        elapsed = time.perf_counter() - start
+
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        request_seconds.observe((app_name, request.method, path, str(response.status_code)), elapsed)
+        if profile is not None:
+            # Streaming bodies are still being produced, so only stages up to the first byte appear
+            response.headers["Server-Timing"] = server_timing(profile, elapsed)
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,272 @@
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+import facet_index
+from catalog_snapshot import CATALOG_SNAPSHOT, load_products
+from data_access import collections, find_in_collections, get_db
+from facet_index import FACET_FIELDS
+from pricing_engine import suggest_prices, explain_spec
+from spec_index import exact_keys, spec_key
+
+# Fields that decide a spec's business opportunity or its /get_filters facets
+OPPORTUNITY_PROJECTION = {
+    "_id": 1, "Brand": 1, "RAM": 1, "Storage": 1,
+    "Processor Series": 1, "Processor Type": 1, "Price": 1
+}
+
+# "auto" uses Mongo change streams when the server supports them (replica
+# sets) and otherwise polls and diffs the collections; "poll" or "off" force either
+OPPORTUNITY_WATCH = os.getenv("OPPORTUNITY_WATCH", "auto")
+OPPORTUNITY_POLL_SECONDS = float(os.getenv("OPPORTUNITY_POLL_SECONDS", "60"))
+
+_table = None
+_build_lock = asyncio.Lock()
+
+
+def _entry(doc):
+    # What the table keeps per document; equal entries mean nothing to recompute
+    return (
+        tuple(exact_keys(doc)),
+        spec_key(doc),
+        tuple(str(doc.get(field, "")).strip() for field in ["Brand", "RAM", "Storage", "Processor Series"]),
+        "Price" in doc,
+        doc.get("Price"),
+        tuple(doc.get(field) for field in FACET_FIELDS.values())
+    )
+
+
+def _facet_doc(entry):
+    return dict(zip(FACET_FIELDS.values(), entry[5]))
+
+
+def new_opportunity_table(brand_factor, platform_factors):
+    return {
+        "docs": {coll: {} for coll in collections},
+        # exact lookup key -> platform -> {_id: (has_price, price)}, in catalog order
+        "listings": {},
+        # spec key -> [display spec, number of documents]
+        "specs": {},
+        "rows": {},
+        # platform -> [(-suggested price, spec key)], kept sorted
+        "top": {coll: [] for coll in collections},
+        "brand_factor": brand_factor,
+        "platform_factors": platform_factors,
+        # False until the table has been diffed against Mongo at least once
+        "synced": False,
+        "updated_at": time.time()
+    }
+
+
+def apply_changes(table, changes):
+    # changes: (coll, _id, doc or None for a delete). Only the spec keys the
+    # old and new versions of each document touch are recomputed
+    # Once the table is built, the same changes keep the facet index current
+    facets = table.get("built_at") is not None
+    affected = set()
+    for coll, doc_id, doc in changes:
+        old = table["docs"][coll].pop(doc_id, None)
+        new = _entry(doc) if doc is not None else None
+        if old == new:
+            if old is not None:
+                table["docs"][coll][doc_id] = old
+            continue
+
+        if facets and (old is None or new is None or old[5] != new[5]):
+            if old is not None:
+                facet_index.remove_document(_facet_doc(old))
+            if new is not None:
+                facet_index.add_document(_facet_doc(new))
+
+        if old is not None:
+            keys, key, _, _, _, _ = old
+            for lookup_key in keys:
+                by_platform = table["listings"][lookup_key]
+                del by_platform[coll][doc_id]
+                if not by_platform[coll]:
+                    del by_platform[coll]
+                if not by_platform:
+                    del table["listings"][lookup_key]
+            table["specs"][key][1] -= 1
+            affected.update(keys)
+
+        if new is not None:
+            keys, key, spec, has_price, price, _ = new
+            for lookup_key in keys:
+                table["listings"].setdefault(lookup_key, {}).setdefault(coll, {})[doc_id] = (has_price, price)
+            table["specs"].setdefault(key, [spec, 0])[1] += 1
+            table["docs"][coll][doc_id] = new
+            affected.update(keys)
+
+    _recompute(table, [key for key in affected if key in table["specs"]])
+    table["updated_at"] = time.time()
+    return len(affected)
+
+
+def _recompute(table, keys):
+    for key in keys:
+        _remove_row(table, key)
+        if table["specs"][key][1] <= 0:
+            del table["specs"][key]
+    keys = [key for key in keys if key in table["specs"]]
+    if not keys:
+        return
+
+    # Same inputs as find_products builds for a catalog spec, in one vectorised pass
+    spec_prices = []
+    for key in keys:
+        by_platform = table["listings"].get(key, {})
+        spec_prices.append({
+            coll: [price for has_price, price in by_platform[coll].values() if has_price]
+            for coll in collections if by_platform.get(coll)
+        })
+    brand_factors = [table["brand_factor"](table["specs"][key][0][0]) for key in keys]
+    engine_result = suggest_prices(spec_prices, brand_factors, collections, table["platform_factors"])
+
+    for i, key in enumerate(keys):
+        suggested_prices, price_breakdown = explain_spec(engine_result, i, True)
+        brand, ram, storage, processor_series = table["specs"][key][0]
+        table["rows"][key] = {
+            "spec": {"brand": brand, "ram": ram, "storage": storage, "processor_series": processor_series},
+            "business_opportunity": suggested_prices,
+            "pricing_explanation": price_breakdown,
+            "missing_platforms": [coll for coll in collections if coll not in spec_prices[i]]
+        }
+        for platform, price in suggested_prices.items():
+            if price != "No Data":
+                insort(table["top"][platform], (-price, key))
+
+
+def _remove_row(table, key):
+    row = table["rows"].pop(key, None)
+    if row is None:
+        return
+    for platform, price in row["business_opportunity"].items():
+        if price == "No Data":
+            continue
+        ranking = table["top"][platform]
+        i = bisect_left(ranking, (-price, key))
+        if i < len(ranking) and ranking[i] == (-price, key):
+            del ranking[i]
+
+
+def reprice_opportunity_table(table, platform_factors):
+    # New factors change every row's suggestions but none of the listings
+    table["platform_factors"] = platform_factors
+    _recompute(table, list(table["specs"]))
+    table["updated_at"] = time.time()
+
+
+async def sync_opportunity_table(table):
+    # Polling stand-in for change streams: diff the collections against the
+    # table's copy and apply only what changed
+    products_by_coll = await find_in_collections(collections, {}, OPPORTUNITY_PROJECTION)
+    changes = []
+    for coll, docs in products_by_coll.items():
+        seen = set()
+        known = table["docs"][coll]
+        for doc in docs:
+            seen.add(doc["_id"])
+            if known.get(doc["_id"]) != _entry(doc):
+                changes.append((coll, doc["_id"], doc))
+        changes += [(coll, doc_id, None) for doc_id in known if doc_id not in seen]
+    if changes:
+        apply_changes(table, changes)
+    table["synced"] = True
+    return len(changes)
+
+
+async def build_opportunity_table(brand_factor, platform_factors):
+    table = new_opportunity_table(brand_factor, platform_factors)
+    if CATALOG_SNAPSHOT:
+        # Seeded without Mongo. Snapshot rows carry no _id, so they get
+        # placeholder ids that the first sync replaces with the live documents
+        products_by_coll = await load_products(OPPORTUNITY_PROJECTION)
+        apply_changes(table, [
+            (coll, doc.get("_id", ("snapshot", i)), doc)
+            for coll, docs in products_by_coll.items() for i, doc in enumerate(docs)
+        ])
+    else:
+        await sync_opportunity_table(table)
+    table["built_at"] = time.time()
+    return table
+
+
+async def get_opportunity_table(brand_factor, platform_factors):
+    global _table
+    if _table is None:
+        async with _build_lock:
+            if _table is None:
+                _table = await build_opportunity_table(brand_factor, platform_factors)
+    return _table
+
+
+async def refresh_opportunity_table(brand_factor, platform_factors):
+    # Builds the table on first use, afterwards applies what changed since the last sync
+    if _table is None:
+        return await get_opportunity_table(brand_factor, platform_factors)
+    await sync_opportunity_table(_table)
+    return _table
+
+
+def top_opportunities(table, platform, n=10):
+    # Highest suggested prices for a platform the spec is missing from;
+    # read straight off the sorted ranking
+    return [table["rows"][key] for _, key in table["top"].get(platform, [])[:n]]
+
+
+def lookup_opportunity(table, brand, ram, storage, processor_series):
+    return table["rows"].get(spec_key({"Brand": brand, "RAM": ram, "Storage": storage, "Processor Series": processor_series}))
+
+
+def _watch_changes(loop, table, stop):
+    # Blocking change-stream reader; changes are applied on the event loop
+    pipeline = [{"$match": {"ns.coll": {"$in": collections}, "operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+    # Wakes up at least once a second, so a set stop event ends the thread
+    with get_db().watch(pipeline, full_document="updateLookup", max_await_time_ms=1000) as stream:
+        while not stop.is_set():
+            change = stream.try_next()
+            if change is None:
+                continue
+            doc = change.get("fullDocument") if change["operationType"] != "delete" else None
+            coll = change["ns"]["coll"]
+            doc_id = change["documentKey"]["_id"]
+            # An update whose document is gone by lookup time is a delete
+            loop.call_soon_threadsafe(apply_changes, table, [(coll, doc_id, doc)])
+
+
+async def watch_opportunity_table(table, mode=None, interval=None):
+    # The settings are read per call, not bound when the module is imported
+    mode = mode or OPPORTUNITY_WATCH
+    interval = OPPORTUNITY_POLL_SECONDS if interval is None else interval
+    if mode == "off":
+        return
+    # A snapshot-seeded table is reconciled with Mongo before following its changes
+    while not table["synced"]:
+        try:
+            changed = await sync_opportunity_table(table)
+            print(f"✅ Opportunity table reconciled with Mongo: {changed} changed documents")
+        except Exception as e:
+            print(f"❌ Opportunity table sync failed ({e}), retrying in {interval}s")
+            await asyncio.sleep(interval)
+    if mode == "auto":
+        stop = threading.Event()
+        try:
+            await asyncio.to_thread(_watch_changes, asyncio.get_running_loop(), table, stop)
+        except asyncio.CancelledError:
+            stop.set()
+            raise
+        except Exception as e:
+            print(f"⚠️ Change streams unavailable ({e}), polling every {interval}s instead")
+        else:
+            return
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            changed = await sync_opportunity_table(table)
+            if changed:
+                print(f"🔄 Opportunity table: {changed} changed documents applied")
+        except Exception as e:
+            print("❌ Opportunity table sync failed:", e)
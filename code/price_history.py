@@ -0,0 +1,194 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from spec_index import spec_key
+
+# Append-only price observations per (platform, listing), written by ingest.py,
+# plus per-listing rolling statistics updated as each observation arrives
+PRICE_HISTORY_PATH = os.getenv("PRICE_HISTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_history.sqlite3"))
+PRICE_EWMA_HALFLIFE_DAYS = float(os.getenv("PRICE_EWMA_HALFLIFE_DAYS", "30"))
+PRICE_WINDOW_DAYS = float(os.getenv("PRICE_WINDOW_DAYS", "90"))
+
+DAY = 86400
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS observations ("
+    "platform TEXT NOT NULL, listing TEXT NOT NULL, observed_at REAL NOT NULL, price REAL, mrp REAL, discount REAL)",
+    "CREATE INDEX IF NOT EXISTS observations_listing ON observations (platform, listing, observed_at)",
+    "CREATE TABLE IF NOT EXISTS listing_stats ("
+    "platform TEXT NOT NULL, listing TEXT NOT NULL, spec TEXT NOT NULL, observations INTEGER NOT NULL, "
+    "first_seen REAL NOT NULL, last_seen REAL NOT NULL, last_price REAL, mrp REAL, discount REAL, "
+    "ewma REAL, window_min REAL, window_max REAL, PRIMARY KEY (platform, listing))",
+    "CREATE INDEX IF NOT EXISTS listing_stats_spec ON listing_stats (spec)"
+]
+
+_history = None
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = re.sub(r"[^\d.]", "", value)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value else None
+
+
+def discount_depth(price, mrp, discount=None):
+    # Share knocked off MRP: from the prices when both are known, else the
+    # listing's Discount field (a percentage)
+    if price is not None and mrp and mrp >= price:
+        return round((mrp - price) / mrp, 4)
+    discount = _number(discount)
+    if discount is not None and 0 <= discount <= 100:
+        return round(discount / 100, 4)
+    return None
+
+
+def spec_id(product):
+    return "|".join(spec_key(product))
+
+
+class PriceHistory:
+    # Observations are only appended when a listing's price, MRP or discount
+    # changes, so re-ingesting an unchanged dump just moves last_seen forward
+    def __init__(self, path, halflife_days=PRICE_EWMA_HALFLIFE_DAYS, window_days=PRICE_WINDOW_DAYS, read_only=False):
+        self.path = path
+        self.halflife = halflife_days * DAY
+        self.window = window_days * DAY
+        self._lock = threading.Lock()
+        self._trends = None
+        self._version = None
+        if read_only:
+            # Readers never create or migrate the file; ingest.py owns it
+            self._conn = sqlite3.connect(Path(path).absolute().as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def record(self, platform, listing, doc, observed_at=None):
+        # Returns True when a new observation was appended. Observations must
+        # arrive in time order per listing; older ones are ignored
+        observed_at = time.time() if observed_at is None else observed_at
+        price = _number(doc.get("Price"))
+        mrp = _number(doc.get("MRP"))
+        discount = discount_depth(price, mrp, doc.get("Discount"))
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT observations, first_seen, last_seen, last_price, mrp, discount, ewma "
+                "FROM listing_stats WHERE platform = ? AND listing = ?", (platform, listing)
+            ).fetchone()
+            if row is not None and observed_at < row[2]:
+                return False
+
+            if row is None:
+                observations, first_seen, ewma = 0, observed_at, price
+            else:
+                observations, first_seen, last_seen, last_price, _, _, ewma = row
+                if ewma is None or last_price is None:
+                    ewma = price
+                else:
+                    # The previous price held from last_seen until now
+                    alpha = 1 - 0.5 ** ((observed_at - last_seen) / self.halflife)
+                    ewma += alpha * (last_price - ewma)
+
+            changed = row is None or (price, mrp, discount) != tuple(row[3:6])
+            if changed:
+                self._conn.execute(
+                    "INSERT INTO observations (platform, listing, observed_at, price, mrp, discount) VALUES (?, ?, ?, ?, ?, ?)",
+                    (platform, listing, observed_at, price, mrp, discount)
+                )
+                observations += 1
+
+            # Bounded by the listing's own observations inside the window
+            window_min, window_max = self._conn.execute(
+                "SELECT MIN(price), MAX(price) FROM observations "
+                "WHERE platform = ? AND listing = ? AND observed_at >= ?",
+                (platform, listing, observed_at - self.window)
+            ).fetchone()
+            if price is not None:
+                window_min = price if window_min is None else min(window_min, price)
+                window_max = price if window_max is None else max(window_max, price)
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO listing_stats (platform, listing, spec, observations, first_seen, last_seen, "
+                "last_price, mrp, discount, ewma, window_min, window_max) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (platform, listing, spec_id(doc), observations, first_seen, observed_at,
+                 price, mrp, discount, ewma, window_min, window_max)
+            )
+            return changed
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+            self._trends = None
+
+    def trends(self):
+        # spec -> platform -> aggregated listing statistics, read once and
+        # re-read only after another process has committed new observations
+        with self._lock:
+            (version,) = self._conn.execute("PRAGMA data_version").fetchone()
+            if self._trends is None or version != self._version:
+                self._trends = self._load_trends()
+                self._version = version
+            return self._trends
+
+    def _load_trends(self):
+        trends = {}
+        rows = self._conn.execute(
+            "SELECT spec, platform, COUNT(*), SUM(observations), AVG(ewma), MIN(window_min), MAX(window_max), "
+            "AVG(last_price), AVG(discount), MAX(last_seen) FROM listing_stats "
+            "WHERE last_price IS NOT NULL GROUP BY spec, platform"
+        )
+        for spec, platform, listings, observations, ewma, low, high, last_price, discount, last_seen in rows:
+            trends.setdefault(spec, {})[platform] = {
+                "listings": listings,
+                "observations": observations,
+                "ewma": round(ewma, 2),
+                "window_min": low,
+                "window_max": high,
+                "last_price": round(last_price, 2),
+                "discount_depth": round(discount, 3) if discount is not None else None,
+                # How far the current price sits above (+) or below (-) its trend
+                "vs_trend": round((last_price - ewma) / ewma, 3) if ewma else None,
+                "last_seen": last_seen
+            }
+        return trends
+
+    def stats(self):
+        with self._lock:
+            (observations,) = self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()
+            (listings,) = self._conn.execute("SELECT COUNT(*) FROM listing_stats").fetchone()
+        return {"observations": observations, "listings": listings}
+
+
+def get_price_history():
+    # Read-only connection for the service, once an ingest has created the
+    # file. One per process: serve.py workers reopen after the fork
+    global _history
+    if not PRICE_HISTORY_PATH or not os.path.exists(PRICE_HISTORY_PATH):
+        return None
+    if _history is None or _history[0] != os.getpid():
+        _history = (os.getpid(), PriceHistory(PRICE_HISTORY_PATH, read_only=True))
+    return _history[1]
+
+
+def spec_trends(brand, ram, storage, processor_series):
+    # platform -> statistics for one spec; empty without any recorded history
+    history = get_price_history()
+    if history is None:
+        return {}
+    spec = spec_id({"Brand": brand, "RAM": ram, "Storage": storage, "Processor Series": processor_series})
+    return history.trends().get(spec, {})
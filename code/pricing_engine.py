@@ -0,0 +1,149 @@
+import os
+import numpy as np
+
+# Share of a reference platform's price taken from its recorded EWMA trend;
+# 0 (the default) prices from the current catalog alone
+PRICE_TREND_WEIGHT = float(os.getenv("PRICE_TREND_WEIGHT", "0"))
+
+# Brand tier pricing adjustment
+BRAND_FACTORS = {
+    "premium": 1.05,
+    "mid": 1.00,
+    "budget": 0.95
+}
+
+
+def build_price_table(spec_prices, platforms):
+    # spec_prices holds one {platform: [prices]} dict per spec, with a key for
+    # every platform that lists the spec (the price list may still be empty).
+    # Returns spec x platform arrays of average price (NaN when unpriced) and
+    # a listed mask.
+    n_specs, n_platforms = len(spec_prices), len(platforms)
+    column = {platform: j for j, platform in enumerate(platforms)}
+
+    listed = np.zeros((n_specs, n_platforms), dtype=bool)
+    cells, prices = [], []
+    for i, by_platform in enumerate(spec_prices):
+        for platform, values in by_platform.items():
+            j = column[platform]
+            listed[i, j] = True
+            cells.extend([i * n_platforms + j] * len(values))
+            prices.extend(values)
+
+    # bincount accumulates in input order, matching sum(prices) / len(prices)
+    size = n_specs * n_platforms
+    cells = np.asarray(cells, dtype=np.int64)
+    sums = np.bincount(cells, weights=np.asarray(prices, dtype=np.float64), minlength=size)
+    counts = np.bincount(cells, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.where(counts > 0, sums / counts, np.nan).reshape(n_specs, n_platforms)
+
+    return {"avg": avg, "listed": listed}
+
+
+def blend_trends(avg, platforms, trends, weight):
+    # Pulls every priced cell toward its platform's EWMA for that spec;
+    # returns the blended averages and the mask of cells that moved
+    trended = np.zeros(avg.shape, dtype=bool)
+    if not weight or not trends:
+        return avg, trended
+    avg = avg.copy()
+    for i, by_platform in enumerate(trends):
+        for j, platform in enumerate(platforms):
+            stats = (by_platform or {}).get(platform)
+            if stats and not np.isnan(avg[i, j]):
+                avg[i, j] = (1 - weight) * avg[i, j] + weight * stats["ewma"]
+                trended[i, j] = True
+    return avg, trended
+
+
+def reference_averages(avg):
+    # Leave-one-out mean of every other priced platform, per spec and platform.
+    # Columns are added left to right so results match the per-spec Python sum.
+    priced = ~np.isnan(avg)
+    values = np.where(priced, avg, 0.0)
+    n_platforms = avg.shape[1]
+
+    ref_sum = np.zeros_like(values)
+    ref_count = np.zeros(avg.shape, dtype=np.int64)
+    for j in range(n_platforms):
+        for k in range(n_platforms):
+            if k != j:
+                ref_sum[:, j] += values[:, k]
+                ref_count[:, j] += priced[:, k]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ref_avg = np.where(ref_count > 0, ref_sum / ref_count, np.nan)
+    return ref_avg, priced
+
+
+def suggest_prices(spec_prices, brand_factors, platforms, platform_factors, trends=None, trend_weight=None):
+    # trends holds one platform -> price history statistics dict per spec
+    weight = PRICE_TREND_WEIGHT if trend_weight is None else trend_weight
+    table = build_price_table(spec_prices, platforms)
+    avg, trended = blend_trends(table["avg"], platforms, trends, weight)
+    ref_avg, priced = reference_averages(avg)
+
+    brand = np.asarray(brand_factors, dtype=np.float64)
+    platform = np.asarray([platform_factors.get(p, 1.00) for p in platforms], dtype=np.float64)
+    combined = brand[:, None] * platform[None, :]
+
+    return {
+        "platforms": list(platforms),
+        "brand_factors": list(brand_factors),
+        "platform_factors": [platform_factors.get(p, 1.00) for p in platforms],
+        "priced": priced,
+        "missing": ~table["listed"],
+        "ref_avg": ref_avg,
+        "combined": combined,
+        "suggested": ref_avg * combined,
+        "trend_weight": weight,
+        "trended": trended
+    }
+
+
+def explain_spec(engine_result, i, web_result_found, trends=None):
+    # Build the business_opportunity / pricing_explanation dicts for row i.
+    # Rounding uses Python's round() on floats so output matches the API exactly.
+    # trends (platform -> price history statistics) is attached for the
+    # reference platforms when there is recorded history; the price itself
+    # only moves with it when PRICE_TREND_WEIGHT is set
+    platforms = engine_result["platforms"]
+    priced = engine_result["priced"][i]
+    brand_factor = engine_result["brand_factors"][i]
+
+    suggested_prices = {}
+    price_breakdown = {}
+    for j, platform in enumerate(platforms):
+        if not engine_result["missing"][i, j]:
+            continue
+        ref_platforms = [p for k, p in enumerate(platforms) if k != j and priced[k]]
+        if ref_platforms:
+            platform_factor = engine_result["platform_factors"][j]
+            suggested = round(float(engine_result["suggested"][i, j]), 2)
+            trended = [p for k, p in enumerate(platforms) if k != j and engine_result["trended"][i, k]]
+            source = f"Average price from platforms {ref_platforms}"
+            if trended:
+                source += f" ({engine_result['trend_weight']:.0%} EWMA trend on {trended})"
+            suggested_prices[platform] = suggested
+            price_breakdown[platform] = {
+                "ref_platforms": ref_platforms,
+                "avg_price": round(float(engine_result["ref_avg"][i, j]), 2),
+                "brand_factor": brand_factor,
+                "platform_factor": platform_factor,
+                "final_factor": round(float(engine_result["combined"][i, j]), 3),
+                "suggested_price": suggested,
+                "strategy": f"{source} × brand factor ({brand_factor}) × platform factor ({platform_factor})",
+                "web_result_found": web_result_found
+            }
+            if trended:
+                price_breakdown[platform]["trend_weight"] = engine_result["trend_weight"]
+            if trends and any(p in trends for p in ref_platforms):
+                price_breakdown[platform]["market_trends"] = {p: trends[p] for p in ref_platforms if p in trends}
+        else:
+            suggested_prices[platform] = "No Data"
+            price_breakdown[platform] = {
+                "web_result_found": web_result_found
+            }
+
+    return suggested_prices, price_breakdown
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from pricing_engine import BRAND_FACTORS
+
+# Platform and brand-tier multipliers used by the rule engine. calibrate_factors.py
+# writes fitted ones to PRICING_FACTORS_PATH; the service picks up a new file
+# within PRICING_FACTORS_CHECK_SECONDS, without a restart
+PRICING_FACTORS_PATH = os.getenv("PRICING_FACTORS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pricing_factors.json"))
+PRICING_FACTORS_CHECK_SECONDS = float(os.getenv("PRICING_FACTORS_CHECK_SECONDS", "5"))
+
+# Used until a factors file has been written
+DEFAULT_PLATFORM_FACTORS = {
+    "reliance": 1.00,
+    "pai": 0.97,
+    "croma": 1.03,
+    "flipkart": 0.95
+}
+
+DEFAULT_FACTORS = {
+    "version": 0,
+    "platform_factors": DEFAULT_PLATFORM_FACTORS,
+    "brand_factors": BRAND_FACTORS,
+    "fitted_at": None
+}
+
+_state = {"factors": DEFAULT_FACTORS, "mtime": None, "checked_at": None}
+
+
+def read_factors(path):
+    with open(path, encoding="utf-8") as f:
+        factors = json.load(f)
+    # Anything the file leaves out keeps its default
+    return {
+        **factors,
+        "version": int(factors.get("version", 0)),
+        "platform_factors": {**DEFAULT_PLATFORM_FACTORS, **factors.get("platform_factors", {})},
+        "brand_factors": {**BRAND_FACTORS, **factors.get("brand_factors", {})}
+    }
+
+
+def get_pricing_factors():
+    # The same dicts are returned until the file changes, so callers can
+    # tell a reload apart by identity
+    now = time.monotonic()
+    if not PRICING_FACTORS_PATH or _state["checked_at"] is not None and now - _state["checked_at"] < PRICING_FACTORS_CHECK_SECONDS:
+        return _state["factors"]
+    _state["checked_at"] = now
+
+    try:
+        mtime = os.stat(PRICING_FACTORS_PATH).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if mtime == _state["mtime"]:
+        return _state["factors"]
+
+    try:
+        factors = read_factors(PRICING_FACTORS_PATH) if mtime is not None else DEFAULT_FACTORS
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        # A half-written or broken file keeps the factors already in use
+        print("❌ Could not load pricing factors:", e)
+        return _state["factors"]
+    _state["factors"] = factors
+    _state["mtime"] = mtime
+    if mtime is not None:
+        print(f"✅ Pricing factors v{factors['version']} loaded")
+    return factors
+
+
+def write_factors(path, factors):
+    # Versioned: the previous file's version plus one, written atomically,
+    # with a copy kept as <name>.v<version>.json
+    version = 1
+    if os.path.exists(path):
+        try:
+            version = read_factors(path)["version"] + 1
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+    factors = {"version": version, **factors}
+    text = json.dumps(factors, indent=2, ensure_ascii=False)
+
+    stem, ext = os.path.splitext(path)
+    with open(f"{stem}.v{version}{ext}", "w", encoding="utf-8") as f:
+        f.write(text)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return factors
@@ -0,0 +1,126 @@
+import re
+from data_access import collections
+
+# Fallback vocabulary used until the catalog has been read
+DEFAULT_BRANDS = ["dell", "hp", "asus", "acer", "apple"]
+DEFAULT_PROCESSORS = ["Core i3", "Core i5", "Core i7", "Core i9", "Ryzen 5", "Ryzen 7"]
+
+# Leading words that may be left out when typing a processor ("i5" for "Core i5")
+PROCESSOR_PREFIXES = {"core", "intel", "amd", "mediatek", "qualcomm"}
+
+PROCESSOR_MAPPING = {
+    "i3": "i3", "corei3": "i3",
+    "i5": "i5", "corei5": "i5",
+    "i7": "i7", "corei7": "i7",
+    "i9": "i9", "corei9": "i9",
+    "ryzen5": "ryzen5", "ryzen7": "ryzen7"
+}
+
+# Sizes below this many GB are read as RAM, the rest (and any TB) as storage,
+# unless a word right after the size says which one it is ("64gb ssd")
+RAM_LIMIT_GB = 128
+SIZE_HINTS = {"ram": "ram", "memory": "ram", "ssd": "storage", "hdd": "storage", "emmc": "storage", "storage": "storage"}
+
+
+def normalize_ram(ram):
+    if not ram:
+        return ""
+    return str(ram).lower().replace(" ", "")
+
+
+def normalize_storage(storage):
+    if not storage:
+        return ""
+    return str(storage).lower().replace(" ", "")
+
+
+def normalize_processor(proc):
+    if not proc:
+        return ""
+    proc = proc.lower().replace(" ", "")
+    return PROCESSOR_MAPPING.get(proc, proc)
+
+
+def squash(text):
+    return re.sub(r"\s+", "", text.lower())
+
+
+def canonical_processor(text):
+    proc = squash(text)
+    return PROCESSOR_MAPPING.get(proc, proc)
+
+
+def _words_pattern(words):
+    return r"\s*".join(re.escape(word) for word in words)
+
+
+def _alternation(patterns):
+    # Longest first so "core ultra 7" wins over "core" and "lenovo" over "len"
+    return "|".join(sorted(set(patterns), key=lambda p: (-len(p), p)))
+
+
+def build_query_parser(brands=None, processors=None, platforms=None):
+    brands = sorted({" ".join(b.lower().split()) for b in (brands or DEFAULT_BRANDS) if b and b.strip()})
+    platforms = list(platforms or collections)
+    brand_words = {word for brand in brands for word in brand.split()}
+
+    processor_aliases = {}
+    for series in list(DEFAULT_PROCESSORS) + list(processors or []):
+        words = str(series or "").lower().split()
+        if not words:
+            continue
+        canonical = canonical_processor(series)
+        variants = [words]
+        if len(words) > 1 and (words[0] in PROCESSOR_PREFIXES or words[0] in brand_words):
+            # "Apple M3" is typed as "m3"; keeping "apple m3" would swallow the brand
+            variants = [words[1:]] if words[0] in brand_words else [words, words[1:]]
+        for variant in variants:
+            processor_aliases.setdefault("".join(variant), (canonical, _words_pattern(variant)))
+
+    pattern = (
+        r"(?<![a-z0-9])(?:"
+        rf"(?P<size>\d+)\s*(?P<unit>gb|tb)(?:\s*(?P<hint>{'|'.join(SIZE_HINTS)}))?"
+        rf"|(?P<processor>{_alternation(p for _, p in processor_aliases.values())})"
+        rf"|(?P<brand>{_alternation(_words_pattern(b.split()) for b in brands)})"
+        rf"|(?P<platform>{_alternation(re.escape(p) for p in platforms)})"
+        r")(?![a-z0-9])"
+    )
+
+    return {
+        "pattern": re.compile(pattern),
+        "processors": {alias: canonical for alias, (canonical, _) in processor_aliases.items()}
+    }
+
+
+def parse_query(parser, query):
+    # Single pass over the query; the first mention of each attribute wins
+    found = {"brand": None, "ram": None, "storage": None, "processor": None, "platform": None}
+
+    for match in parser["pattern"].finditer(query.lower()):
+        kind = match.lastgroup
+        if kind in ("unit", "hint"):
+            size, unit = int(match.group("size")), match.group("unit")
+            attribute = SIZE_HINTS.get(match.group("hint")) or ("ram" if unit == "gb" and size < RAM_LIMIT_GB else "storage")
+            value = f"{size}{unit}"
+        elif kind == "processor":
+            attribute, value = "processor", parser["processors"][squash(match.group(kind))]
+        elif kind == "brand":
+            attribute, value = "brand", " ".join(match.group(kind).split())
+        else:
+            attribute, value = "platform", match.group(kind)
+
+        if found[attribute] is None:
+            found[attribute] = value
+
+    return found
+
+
+def vocabulary_from_products(products_by_coll):
+    brands, processors = set(), set()
+    for products in products_by_coll.values():
+        for doc in products:
+            if doc.get("Brand"):
+                brands.add(str(doc["Brand"]))
+            if doc.get("Processor Series"):
+                processors.add(str(doc["Processor Series"]))
+    return {"brands": sorted(brands), "processors": sorted(processors)}
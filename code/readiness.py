@@ -0,0 +1,48 @@
+import os
+import time
+from fastapi.responses import JSONResponse
+
+# Set WARMUP=0 to skip priming at startup (indexes are then built on first use)
+WARMUP = os.getenv("WARMUP", "1") != "0"
+
+_state = {"ready": False, "warmup_seconds": None, "error": None}
+
+
+def index_status(index):
+    # Size and age of an in-memory index, or None while it has not been built
+    if index is None:
+        return None
+    built_at = index.get("built_at", index.get("updated_at"))
+    return {
+        "size": index.get("size", len(index.get("rows", ()))),
+        "built_at": built_at,
+        "age_seconds": round(time.time() - built_at, 3) if built_at else None
+    }
+
+
+def add_readiness(app, warm_up, describe):
+    # warm_up() runs during startup, before the server accepts connections;
+    # GET /ready answers 503 until it has finished
+    @app.on_event("startup")
+    async def run_warm_up():
+        if not WARMUP:
+            _state["ready"] = True
+            return
+        start = time.perf_counter()
+        try:
+            await warm_up()
+        except Exception as e:
+            # Stay unready; requests still build what they need lazily
+            _state["error"] = str(e)
+            print("❌ Warm-up failed:", e)
+            return
+        _state["warmup_seconds"] = round(time.perf_counter() - start, 3)
+        _state["ready"] = True
+        print(f"✅ Worker {os.getpid()} warmed up in {_state['warmup_seconds']}s")
+
+    @app.get("/ready", include_in_schema=False)
+    async def ready():
+        body = {**_state, "pid": os.getpid(), "indexes": describe()}
+        return JSONResponse(body, status_code=200 if _state["ready"] else 503)
+
+    return app
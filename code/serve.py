@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# Run from the code/ directory: python serve.py backend2|chatbot [--workers N] [--port P]
+# POSIX only: workers are forked from a parent that has already built the indexes
+
+
+def prebuild(app_name):
+    # Everything built here is inherited by the workers and shared copy-on-write
+    if app_name == "backend2":
+        import backend2
+        from catalog_snapshot import load_products
+        from facet_index import refresh_facet_index
+        from local_model import get_local_model
+        from similarity_index import get_similarity_index
+        from spec_index import PRODUCT_PROJECTION, refresh_spec_index
+
+        async def build():
+            products_by_coll = await load_products(PRODUCT_PROJECTION)
+            index = await refresh_spec_index(products_by_coll)
+            get_local_model(get_similarity_index(index, backend2.get_brand_tier))
+            await refresh_facet_index(products_by_coll)
+            await backend2.current_opportunity_table()
+
+        asyncio.run(build())
+        return backend2.app
+
+    import chatbot_query
+    asyncio.run(chatbot_query.load_query_parser())
+    return chatbot_query.app
+
+
+def listen(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level):
+    import uvicorn
+    import data_access
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    data_access.reconnect()
+    # SQLite handles (the web cache, the price history) reopen themselves on first use in this process
+    # The startup warm-up runs before this worker starts accepting on the shared socket
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on", log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an app from several forked workers sharing one catalog")
+    parser.add_argument("app", choices=["backend2", "chatbot"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--snapshot", help="catalog snapshot directory (sets CATALOG_SNAPSHOT)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        import catalog_snapshot
+        catalog_snapshot.CATALOG_SNAPSHOT = args.snapshot
+
+    start = time.perf_counter()
+    app = prebuild(args.app)
+    sock = listen(args.host, args.port)
+    print(f"✅ {args.app} catalog built in {time.perf_counter() - start:.2f}s, starting {args.workers} workers on {args.host}:{args.port}")
+
+    # Keep the garbage collector from touching (and so copying) the inherited objects
+    gc.collect()
+    gc.freeze()
+
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, args.log_level)
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} exited: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        workers.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} died (status {status}), restarting")
+            time.sleep(1)
+            spawn()
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import re
+import time
+import numpy as np
+from spec_index import normalize_value
+
+# Feature columns, each scaled so one step (doubling RAM, storage or price,
+# two processor tiers, four generations, one brand tier) is a distance of 1
+FEATURES = ["ram", "storage", "processor_tier", "processor_generation", "brand_tier", "price"]
+WEIGHTS = np.array([1.0, 1.0, 0.5, 0.25, 1.0, 1.0])
+
+# Squared distance charged when the query has a feature the product lacks;
+# most catalog listings do not state a processor generation, so that is free
+MISSING_PENALTY = np.array([1.0, 1.0, 1.0, 0.0, 1.0, 1.0])
+FAMILY_PENALTY = 1.0
+
+BRAND_TIERS = {"budget": 0, "mid": 1, "premium": 2}
+PROCESSOR_FAMILIES = {"": 0, "intel": 1, "amd": 2, "apple": 3, "arm": 4}
+
+# Columns that must agree for two listings to be the same configuration
+SPEC_COLUMNS = [0, 1, 2, 3]
+
+SIMILAR_K = int(os.getenv("SIMILAR_K", "10"))
+SIMILAR_MAX_DISTANCE = float(os.getenv("SIMILAR_MAX_DISTANCE", "2.0"))
+
+SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(tb|gb)?")
+GENERATION_PATTERN = re.compile(r"(\d+)\s*(?:st|nd|rd|th)\s*gen")
+APPLE_PATTERN = re.compile(r"\bm([1-9])\b\s*(pro|max)?")
+APPLE_TIERS = {None: 7, "pro": 8, "max": 9}
+
+# (pattern, family, tier); the tier of an empty-tier entry is the first group
+PROCESSOR_PATTERNS = [
+    (re.compile(r"ultra\s*([579])\b"), "intel", None),
+    (re.compile(r"(?:\bcore\s*|\b)i([3579])\b"), "intel", None),
+    (re.compile(r"ryzen\s*([3579])\b"), "amd", None),
+    (re.compile(r"celeron|pentium"), "intel", 1),
+    (re.compile(r"athlon"), "amd", 1),
+    (re.compile(r"snapdragon|mediatek"), "arm", 3)
+]
+
+_index = None
+
+
+def size_gb(value):
+    # "16 GB", "1 TB ", "1024GB" or a bare number of GB; NaN when unreadable
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value > 0 else np.nan
+    match = SIZE_PATTERN.search(normalize_value(value))
+    if not match or float(match.group(1)) <= 0:
+        return np.nan
+    return float(match.group(1)) * (1024 if match.group(2) == "tb" else 1)
+
+
+def processor_features(series, processor_type=None):
+    # (family, tier, generation) from free text such as "Core i5",
+    # "i5 12th Gen", "Ryzen 7 5800H" or "Apple M3 Pro"; unknowns are NaN
+    text = f"{normalize_value(series)} {normalize_value(processor_type)}"
+    generation = GENERATION_PATTERN.search(text)
+    generation = float(generation.group(1)) if generation else np.nan
+
+    match = APPLE_PATTERN.search(text)
+    if match:
+        return "apple", float(APPLE_TIERS[match.group(2)]), float(match.group(1))
+
+    for pattern, family, tier in PROCESSOR_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            if family == "amd" and np.isnan(generation):
+                # Ryzen model numbers lead with the generation: Ryzen 5 5500U
+                model = re.search(r"ryzen\s*\d\s*(\d)\d{3}", text)
+                generation = float(model.group(1)) if model else np.nan
+            return family, float(tier if tier is not None else match.group(1)), generation
+
+    return "", np.nan, generation
+
+
+def price_feature(price):
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return np.nan
+    return np.log2(price) * WEIGHTS[5] if price > 0 else np.nan
+
+
+def feature_vector(brand, ram, storage, processor_series, brand_tier, processor_type=None, price=None):
+    family, tier, generation = processor_features(processor_series, processor_type)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.array([
+            np.log2(size_gb(ram)), np.log2(size_gb(storage)), tier, generation,
+            BRAND_TIERS.get(brand_tier(str(brand or "")), np.nan), 0.0
+        ]) * WEIGHTS
+    values[5] = price_feature(price)
+    return values.astype(np.float32), PROCESSOR_FAMILIES[family]
+
+
+def build_similarity_index(spec_index, brand_tier):
+    # coll -> feature matrix (one row per product, same positions as the spec
+    # index), processor family and brand codes, queried by brute force
+    brands = {}
+    colls = {}
+    # Listings repeat a handful of configurations; parse each one once
+    specs = {}
+    for coll, products in spec_index["products"].items():
+        features = np.empty((len(products), len(FEATURES)), dtype=np.float32)
+        families = np.zeros(len(products), dtype=np.int8)
+        brand_codes = np.zeros(len(products), dtype=np.int32)
+        for position, product in enumerate(products):
+            fields = tuple(str(product.get(field)) for field in ["Brand", "RAM", "Storage", "Processor Series", "Processor Type"])
+            if fields not in specs:
+                specs[fields] = feature_vector(
+                    product.get("Brand"), product.get("RAM"), product.get("Storage"), product.get("Processor Series"),
+                    brand_tier, product.get("Processor Type")
+                )
+            features[position], families[position] = specs[fields]
+            features[position, 5] = price_feature(product.get("Price"))
+            brand_codes[position] = brands.setdefault(normalize_value(product.get("Brand")), len(brands))
+        colls[coll] = {"features": features, "families": families, "brands": brand_codes}
+
+    return {
+        "products": spec_index["products"], "colls": colls, "brands": brands, "brand_tier": brand_tier,
+        "size": spec_index["size"], "built_at": time.time()
+    }
+
+
+def get_similarity_index(spec_index, brand_tier):
+    # Rebuilt whenever the spec index has been rebuilt over a new catalog read
+    global _index
+    if _index is None or _index["products"] is not spec_index["products"]:
+        _index = build_similarity_index(spec_index, brand_tier)
+    return _index
+
+
+def _distances(index, coll, query, family, columns=None):
+    entry = index["colls"][coll]
+    known = ~np.isnan(query)
+    if columns is not None:
+        known[[j for j in range(len(FEATURES)) if j not in columns]] = False
+
+    diff = entry["features"][:, known] - query[known]
+    squared = np.where(np.isnan(diff), MISSING_PENALTY[known], diff * diff)
+    distances = squared.sum(axis=1)
+    if family:
+        distances += FAMILY_PENALTY * (entry["families"] != family)
+    return distances
+
+
+def _query(index, brand, ram, storage, processor_series, price=None):
+    return feature_vector(brand, ram, storage, processor_series, index["brand_tier"], price=price)
+
+
+def lookup_nearest(index, coll, brand, ram, storage, processor_series, price=None, k=SIMILAR_K, max_distance=SIMILAR_MAX_DISTANCE):
+    # Up to k other-brand products closest to the spec, nearest first
+    if coll not in index["colls"] or not len(index["colls"][coll]["families"]):
+        return []
+    query, family = _query(index, brand, ram, storage, processor_series, price)
+    distances = _distances(index, coll, query, family)
+
+    brand_code = index["brands"].get(normalize_value(brand), -1)
+    distances[index["colls"][coll]["brands"] == brand_code] = np.inf
+    candidates = np.flatnonzero(distances <= max_distance)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(distances[candidates], k - 1)[:k]]
+    # Ties keep catalog order
+    candidates = candidates[np.lexsort((candidates, distances[candidates]))]
+
+    products = index["products"][coll]
+    return [products[i] for i in candidates]
+
+
+def lookup_equivalent(index, coll, brand, ram, storage, processor_series):
+    # Same-brand products with the same configuration written differently,
+    # e.g. "1 TB" for "1024 GB" or "Core i5" for "i5 12th Gen"
+    if coll not in index["colls"]:
+        return []
+    query, family = _query(index, brand, ram, storage, processor_series)
+    if np.isnan(query[SPEC_COLUMNS[:3]]).any():
+        return []
+    distances = _distances(index, coll, query, family, SPEC_COLUMNS)
+
+    brand_code = index["brands"].get(normalize_value(brand), -1)
+    matches = np.flatnonzero((distances == 0) & (index["colls"][coll]["brands"] == brand_code))
+    products = index["products"][coll]
+    return [products[i] for i in matches]
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from catalog_snapshot import load_products
+from data_access import collections, find_in_collections
+
+# Fields returned for every product, both for exact matches and similar products
+PRODUCT_PROJECTION = {
+    "_id": 0, "Brand": 1, "Product Name": 1, "Processor Type": 1,
+    "Processor Series": 1, "Price": 1, "MRP": 1, "RAM": 1, "Storage": 1
+}
+
+# Lowercase copies of the match fields, written by ingest.py
+SHADOW_FIELDS = {
+    "Brand": "brand_lc",
+    "RAM": "ram_lc",
+    "Storage": "storage_lc",
+    "Processor Series": "processor_series_lc",
+    "Processor Type": "processor_type_lc"
+}
+
+# "memory" answers lookups from the in-process index, "mongo" queries the
+# shadow fields per request instead of holding the whole catalog
+SPEC_LOOKUP = os.getenv("SPEC_LOOKUP", "memory")
+
+_index = None
+_build_lock = asyncio.Lock()
+
+
+def normalize_value(value):
+    if value is None:
+        return ""
+    return str(value).strip().lower()
+
+
+def shadow_fields(doc):
+    return {shadow: normalize_value(doc.get(field)) for field, shadow in SHADOW_FIELDS.items()}
+
+
+def candidate_query(brand, ram, storage, processor_series):
+    # Plain equality on the shadow fields, one $or branch per compound index,
+    # covering both the exact matches and the similar products of a spec
+    brand, ram, storage, processor = (normalize_value(v) for v in (brand, ram, storage, processor_series))
+    return {"$or": [
+        {"brand_lc": brand, "ram_lc": ram, "storage_lc": storage, "processor_series_lc": processor},
+        {"brand_lc": brand, "ram_lc": ram, "storage_lc": storage, "processor_type_lc": processor},
+        {"ram_lc": ram, "storage_lc": storage, "processor_series_lc": processor}
+    ]}
+
+
+def spec_key(product):
+    # Normalized (brand, ram, storage, processor series) of a catalog document
+    return (
+        normalize_value(product.get("Brand")), normalize_value(product.get("RAM")),
+        normalize_value(product.get("Storage")), normalize_value(product.get("Processor Series"))
+    )
+
+
+def exact_keys(product):
+    # Every lookup key the document is an exact match for: Apple is matched
+    # on Processor Series only, other brands on either processor field
+    brand, ram, storage, series = key = spec_key(product)
+    processor_type = normalize_value(product.get("Processor Type"))
+    if brand != "apple" and processor_type != series:
+        return [key, (brand, ram, storage, processor_type)]
+    return [key]
+
+
+def build_spec_index(products_by_coll):
+    # exact:   coll -> (brand, ram, storage, processor) -> [positions]
+    # similar: coll -> (ram, storage, processor series) -> [(brand, position)]
+    # Positions index into products_by_coll, which may be snapshot-backed
+    exact = {coll: {} for coll in products_by_coll}
+    similar = {coll: {} for coll in products_by_coll}
+    size = 0
+
+    for coll, products in products_by_coll.items():
+        for position, product in enumerate(products):
+            for key in exact_keys(product):
+                exact[coll].setdefault(key, []).append(position)
+
+            brand, ram, storage, series = spec_key(product)
+            similar[coll].setdefault((ram, storage, series), []).append((brand, position))
+            size += 1
+
+    return {
+        "products": products_by_coll, "exact": exact, "similar": similar,
+        "size": size, "built_at": time.time()
+    }
+
+
+async def get_spec_index():
+    if _index is None:
+        async with _build_lock:
+            # Concurrent first requests wait for a single build
+            if _index is None:
+                await refresh_spec_index()
+    return _index
+
+
+async def refresh_spec_index(products_by_coll=None):
+    global _index
+    if products_by_coll is None:
+        products_by_coll = await load_products(PRODUCT_PROJECTION)
+    _index = build_spec_index(products_by_coll)
+    return _index
+
+
+async def load_spec_candidates(brand, ram, storage, processor_series):
+    # Index over just the documents that can match this spec; the same
+    # lookups then apply the Apple and cross-brand rules
+    products_by_coll = await find_in_collections(
+        collections, candidate_query(brand, ram, storage, processor_series), PRODUCT_PROJECTION, sort=[("_id", 1)]
+    )
+    return build_spec_index(products_by_coll)
+
+
+def invalidate_spec_index():
+    # The next lookup rebuilds the index from the collections
+    global _index
+    _index = None
+
+
+def lookup_exact(index, coll, brand, ram, storage, processor_series):
+    key = (
+        normalize_value(brand), normalize_value(ram),
+        normalize_value(storage), normalize_value(processor_series)
+    )
+    products = index["products"].get(coll, [])
+    return [products[i] for i in index["exact"].get(coll, {}).get(key, [])]
+
+
+def lookup_similar(index, coll, brand, ram, storage, processor_series):
+    key = (normalize_value(ram), normalize_value(storage), normalize_value(processor_series))
+    brand = normalize_value(brand)
+    products = index["products"].get(coll, [])
+    return [
+        products[i] for product_brand, i in index["similar"].get(coll, {}).get(key, [])
+        if product_brand != brand
+    ]
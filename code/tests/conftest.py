@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Tests import the service modules the way the scripts do, from code/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Caches and history go to a scratch directory, never next to the code
+_scratch = tempfile.mkdtemp(prefix="spi-tests-")
+os.environ.setdefault("WEB_CACHE_PATH", os.path.join(_scratch, "web_cache.sqlite3"))
+os.environ.setdefault("PRICE_HISTORY_PATH", os.path.join(_scratch, "price_history.sqlite3"))
+os.environ.setdefault("PRICING_FACTORS_PATH", os.path.join(_scratch, "pricing_factors.json"))
@@ -0,0 +1,126 @@
+import os
+import time
+import pytest
+import cache_utils
+from cache_utils import MISSING, LRUCache, SQLiteCache, TieredCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_utils.time, "time", clock)
+    return clock
+
+
+def test_lru_expires_and_evicts(clock):
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    assert cache.get("a") == 1
+    clock.now += 5
+    assert cache.get("b") is MISSING
+    cache.set("c", 3)
+    cache.set("d", 4)
+    assert cache.get("a") is MISSING
+    assert cache.stats() == {"size": 2, "hits": 1, "misses": 2}
+
+
+def test_sqlite_returns_remaining_ttl(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=100)
+    cache.set("found", True)
+    cache.set("not_found", False, ttl=10)
+    clock.now += 4
+    assert cache.get_entry("found") == (True, pytest.approx(96))
+    assert cache.get_entry("not_found") == (False, pytest.approx(6))
+    clock.now += 7
+    assert cache.get_entry("not_found") == (MISSING, None)
+    assert cache.get("found") is True
+    assert cache.stats() == {"size": 1, "hits": 3, "misses": 1}
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_sqlite_hits_do_not_write(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("a", 1)
+    changes = cache._conn.total_changes
+    for _ in range(3):
+        assert cache.get("a") == 1
+    assert cache._conn.total_changes == changes
+
+
+def test_tiered_promotion_keeps_the_disk_ttl(tmp_path, clock):
+    # A negative result cached for 10 s must not live 24 h in memory once promoted
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=86400)
+    disk.set("query", False, ttl=10)
+    cache = TieredCache(LRUCache(ttl=86400), disk)
+
+    assert cache.get("query") is False
+    clock.now += 5
+    assert cache.memory.get("query") is False
+    clock.now += 6
+    assert cache.get("query") is MISSING
+
+
+def test_sqlite_reopens_after_fork(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("a", 1)
+    parent = cache._conn
+    monkeypatch.setattr(cache_utils.os, "getpid", lambda: -1)
+    assert cache.get("a") == 1
+    assert cache._conn is not parent
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="POSIX only")
+def test_forked_child_uses_its_own_connection(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("parent", 1)
+    parent = cache._conn
+    pid = os.fork()
+    if pid == 0:
+        try:
+            cache.set("child", 2)
+            ok = cache.get("parent") == 1 and cache._conn is not parent
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache._conn is parent
+    assert cache.get("child") == 2
+
+
+def test_cache_counters_on_metrics(tmp_path):
+    import metrics
+    cache = TieredCache(LRUCache(), SQLiteCache(str(tmp_path / "cache.sqlite3")))
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    source = lambda: {("test", tier): stats for tier, stats in cache.stats().items()}
+    metrics.register_cache_stats(source)
+    try:
+        text = metrics.render_metrics()
+    finally:
+        metrics._cache_sources.remove(source)
+    assert 'cache_hits_total{cache="test",tier="memory"} 1' in text
+    assert 'cache_misses_total{cache="test",tier="disk"} 1' in text
+    assert 'cache_entries{cache="test",tier="disk"} 1' in text
@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+import os
+import pytest
+import catalog_snapshot
+import catalog_table
+import data_access
+from benchmarks import load_catalog, seeded_client
+from catalog_table import build_catalog_table, rows_to_results, select_rows
+from chatbot_query import format_db_results
+
+BRANDS = [None, "dell", "hp", "asus", "apple", "lenovo"]
+RAMS = [None, "8gb", "16gb"]
+STORAGES = [None, "512gb", "1tb"]
+PROCESSORS = [None, "i5", "i7", "ryzen5"]
+PLATFORMS = [None, "croma", "flipkart"]
+
+
+def old_normalize(value):
+    return str(value).lower().replace(" ", "") if value else ""
+
+
+def old_normalize_processor(proc):
+    proc = old_normalize(proc)
+    mapping = {"corei3": "i3", "corei5": "i5", "corei7": "i7", "corei9": "i9"}
+    return mapping.get(proc, proc)
+
+
+def old_get_price_from_db(catalog, brand, ram, storage, processor, platform=None):
+    # The per-document scan get_price_from_db used to run on every message
+    results = []
+    for coll in [platform] if platform else data_access.collections:
+        for doc in catalog[coll]:
+            if brand and brand.lower() not in str(doc.get("Brand", "")).lower():
+                continue
+            if ram and ram != old_normalize(doc.get("RAM", "")):
+                continue
+            if storage and storage != old_normalize(doc.get("Storage", "")):
+                continue
+            if processor and processor not in old_normalize_processor(f"{doc.get('Processor Series', '')} {doc.get('Processor Type', '')}"):
+                continue
+            results.append({
+                "platform": coll, "product": doc.get("Product Name"), "price": doc.get("Price"),
+                "ram": doc.get("RAM"), "storage": doc.get("Storage"), "processor": doc.get("Processor Series")
+            })
+    return results
+
+
+def old_format(results):
+    pd = pytest.importorskip("pandas")
+    response_lines = ["✅ Product found in our database:\n"]
+    for platform, group in pd.DataFrame(results).groupby("platform"):
+        response_lines.append(f"🔸 **{platform.capitalize()}**")
+        for _, row in group.iterrows():
+            response_lines.append(
+                f"• **Product:** {row['product']}\n"
+                f"  → ₹{row['price']}\n"
+                f"  RAM: {row['ram']} | Storage: {row['storage']} | Processor: {row['processor']}\n"
+            )
+    return "\n".join(response_lines)
+
+
+def test_lookups_match_the_document_scan():
+    catalog = load_catalog()
+    table = build_catalog_table(catalog)
+    matched = 0
+    for brand, ram, storage, processor, platform in itertools.product(BRANDS, RAMS, STORAGES, PROCESSORS, PLATFORMS):
+        expected = old_get_price_from_db(catalog, brand, ram, storage, processor, platform)
+        results = rows_to_results(table, select_rows(table, brand, ram, storage, processor, platform))
+        assert results == expected, (brand, ram, storage, processor, platform)
+        if expected and brand and ram:
+            matched += 1
+            # As strings, so pandas' dtype coercion (37990 -> 37990.0) leaves the prices alone
+            rows = [{**row, "price": str(row["price"])} for row in results]
+            assert format_db_results(rows) == old_format(rows)
+    assert matched
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(data_access, "client", seeded_client())
+    monkeypatch.setattr(catalog_table, "_table", None)
+    return data_access.client
+
+
+def test_refresh_index_picks_up_catalog_changes(client):
+    from fastapi.testclient import TestClient
+    import chatbot_query
+    chatbot = TestClient(chatbot_query.app)
+    query = {"query": "zephyrbook 16gb laptop price"}
+    assert "Zephyrbook" not in chatbot.post("/chatbot", json=query).json()["response"]
+
+    client[data_access.MONGO_DB]["croma"].insert_one({
+        "Brand": "Zephyrbook", "Product Name": "Zephyrbook Air", "Price": 45000,
+        "RAM": "16 GB", "Storage": "512 GB", "Processor Series": "Core i5"
+    })
+    assert chatbot.post("/refresh_index").json()["indexed_products"] == catalog_table._table["size"]
+    response = chatbot.post("/chatbot", json=query).json()["response"]
+    # The rebuilt parser knows the new brand too
+    assert "Zephyrbook Air" in response and "Dell" not in response
+
+
+def test_table_follows_a_newer_snapshot(client, tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot")
+    monkeypatch.setattr(catalog_snapshot, "CATALOG_SNAPSHOT", path)
+    monkeypatch.setattr(catalog_snapshot, "_snapshot", None)
+    catalog = load_catalog()
+    catalog_snapshot.export_snapshot(path, catalog)
+    table = asyncio.run(catalog_table.get_catalog_table())
+    assert asyncio.run(catalog_table.get_catalog_table()) is table
+
+    catalog["croma"] = catalog["croma"][:10]
+    catalog_snapshot.export_snapshot(path, catalog)
+    meta_path = os.path.join(path, "meta.json")
+    mtime = os.path.getmtime(meta_path) + 1
+    os.utime(meta_path, (mtime, mtime))
+    rebuilt = asyncio.run(catalog_table.get_catalog_table())
+    assert rebuilt is not table
+    assert rebuilt["size"] == table["size"] - len(load_catalog()["croma"]) + 10
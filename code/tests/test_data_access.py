@@ -0,0 +1,49 @@
+import asyncio
+import time
+import pytest
+import data_access
+from benchmarks import seeded_client
+
+PROJECTION = {"_id": 0, "Brand": 1, "RAM": 1, "Price": 1}
+
+
+@pytest.fixture
+def client():
+    previous = data_access.client
+    client = seeded_client()
+    data_access.set_client(client)
+    yield client
+    data_access.set_client(previous)
+
+
+def test_find_in_collections_matches_per_collection_queries(client):
+    query = {"Brand": "Dell"}
+    sort = [("Price", 1)]
+    results = asyncio.run(data_access.find_in_collections(data_access.collections, query, PROJECTION, sort))
+
+    assert list(results) == data_access.collections
+    for coll in data_access.collections:
+        expected = list(client[data_access.MONGO_DB][coll].find(query, PROJECTION).sort(sort))
+        assert results[coll] == expected
+    assert any(results.values())
+
+
+def test_find_in_collections_queries_concurrently():
+    previous = data_access.client
+    data_access.set_client(seeded_client(latency=0.2))
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(data_access.find_in_collections(data_access.collections, {"Brand": "HP"}, PROJECTION))
+        elapsed = time.perf_counter() - start
+    finally:
+        data_access.set_client(previous)
+
+    # Four collections at 0.2 s each: sequential would take 0.8 s
+    assert elapsed < 0.6
+    assert all(doc["Brand"] == "HP" for docs in results.values() for doc in docs)
+
+
+def test_find_copies_the_projection(client):
+    projection = dict(PROJECTION)
+    asyncio.run(data_access.find("croma", {}, projection))
+    assert projection == PROJECTION
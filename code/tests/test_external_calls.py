@@ -0,0 +1,187 @@
+import asyncio
+import time
+import pytest
+from benchmarks import FakeGenerativeModel, UpstreamError
+from external_calls import CircuitOpenError, ExternalService
+
+
+def service(**kwargs):
+    options = {"timeout": 1.0, "retries": 0, "backoff": 0.0, "failure_threshold": 2, "reset_timeout": 0.05}
+    return ExternalService("test", **{**options, **kwargs})
+
+
+def test_breaker_opens_after_consecutive_failures():
+    svc = service()
+    failing = FakeGenerativeModel(failure_rate=1.0)
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            asyncio.run(svc.call(failing.generate_content, "prompt"))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(svc.call(failing.generate_content, "prompt"))
+    assert failing.calls == 2
+    assert svc.stats()["state"] == "open"
+
+
+def test_half_open_trial_closes_or_reopens():
+    svc = service()
+    failing = FakeGenerativeModel(failure_rate=1.0)
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            svc.call_sync(failing.generate_content, "prompt")
+
+    time.sleep(0.06)
+    assert svc.breaker.state == "half_open"
+    with pytest.raises(UpstreamError):
+        svc.call_sync(failing.generate_content, "prompt")
+    # A failed trial opens the circuit again straight away
+    assert svc.breaker.state == "open"
+
+    time.sleep(0.06)
+    assert svc.call_sync(FakeGenerativeModel().generate_content, "prompt").text == FakeGenerativeModel.text
+    assert svc.breaker.state == "closed" and svc.breaker.failures == 0
+
+
+def open_then_half_open(svc):
+    failing = FakeGenerativeModel(failure_rate=1.0)
+    for _ in range(2):
+        with pytest.raises(UpstreamError):
+            svc.call_sync(failing.generate_content, "prompt")
+    time.sleep(0.06)
+    assert svc.breaker.state == "half_open"
+
+
+def test_cancelled_trial_call_does_not_wedge_the_breaker():
+    svc = service()
+    open_then_half_open(svc)
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(svc.call(FakeGenerativeModel(latency=0.5).generate_content, "prompt"))
+        await asyncio.sleep(0.05)
+        assert svc.breaker.trial_running
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert not svc.breaker.trial_running
+    # The next call is the new trial and closes the circuit
+    assert asyncio.run(svc.call(FakeGenerativeModel().generate_content, "prompt")).text == FakeGenerativeModel.text
+    assert svc.breaker.state == "closed"
+
+
+def test_abandoned_trial_stream_does_not_wedge_the_breaker():
+    svc = service()
+    open_then_half_open(svc)
+    model = FakeGenerativeModel(latency=0.2)
+
+    async def read_one_chunk():
+        chunks = svc.stream(model.generate_content, "prompt", stream=True)
+        async for _ in chunks:
+            break
+        await chunks.aclose()
+
+    asyncio.run(read_one_chunk())
+    assert not svc.breaker.trial_running
+    assert svc.inflight == 0
+    assert svc.call_sync(FakeGenerativeModel().generate_content, "prompt").text == FakeGenerativeModel.text
+
+
+def test_retries_until_a_call_succeeds():
+    svc = service(retries=2, failure_threshold=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise UpstreamError("injected failure")
+        return "ok"
+
+    assert asyncio.run(svc.call(flaky)) == "ok"
+    assert len(attempts) == 3
+    assert svc.breaker.failures == 0
+
+
+def test_retries_give_up_with_the_last_error():
+    svc = service(retries=1, failure_threshold=5)
+    failing = FakeGenerativeModel(failure_rate=1.0)
+    with pytest.raises(UpstreamError):
+        svc.call_sync(failing.generate_content, "prompt")
+    assert failing.calls == 2
+    assert svc.breaker.failures == 2
+
+
+def test_slow_calls_time_out():
+    svc = service(timeout=0.05, failure_threshold=5)
+    with pytest.raises(TimeoutError):
+        asyncio.run(svc.call(FakeGenerativeModel(latency=0.3).generate_content, "prompt"))
+    assert svc.breaker.failures == 1
+
+
+class RequestError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def test_invalid_requests_are_not_retried_or_counted():
+    svc = service(retries=2)
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise RequestError(400)
+
+    for _ in range(3):
+        with pytest.raises(RequestError):
+            asyncio.run(svc.call(invalid))
+    with pytest.raises(ValueError):
+        svc.call_sync(lambda: int("not a price"))
+    assert len(attempts) == 3
+    assert svc.breaker.failures == 0 and svc.breaker.state == "closed"
+
+
+def test_rate_limits_and_connection_errors_are_retried():
+    svc = service(retries=2, failure_threshold=5)
+    errors = [RequestError(429), ConnectionResetError("reset by peer")]
+
+    def flaky():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert svc.call_sync(flaky) == "ok"
+    assert not errors
+
+
+def test_transport_timeout_frees_the_pool_thread():
+    # With one pool thread, a hung call that keeps running would leave the
+    # next call queued until it times out as well
+    svc = service(max_concurrency=1, timeout=0.5, failure_threshold=5)
+    hung = FakeGenerativeModel(latency=5.0)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        asyncio.run(svc.call(hung.generate_content, "prompt", request_options={"timeout": 0.1}))
+    assert asyncio.run(svc.call(FakeGenerativeModel().generate_content, "prompt")).text == FakeGenerativeModel.text
+    assert time.perf_counter() - start < 1.0
+
+
+def test_gemini_calls_carry_the_timeout():
+    import genai_utils
+    seen = []
+
+    class RecordingModel(FakeGenerativeModel):
+        def generate_content(self, prompt, stream=False, request_options=None):
+            seen.append((stream, request_options))
+            return super().generate_content(prompt, stream, request_options)
+
+    original = genai_utils.model
+    genai_utils.set_model(RecordingModel())
+    try:
+        genai_utils._generate_text("prompt")
+        list(genai_utils._stream_text("prompt"))
+    finally:
+        genai_utils.set_model(original)
+    assert seen == [
+        (False, {"timeout": genai_utils.gemini.timeout}),
+        (True, {"timeout": genai_utils.GENAI_STREAM_TIMEOUT})
+    ]
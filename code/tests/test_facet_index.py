@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+import data_access
+import facet_index
+import opportunity_table
+from benchmarks import seeded_client
+from facet_index import build_facet_index, lookup_facets
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    client = seeded_client()
+    monkeypatch.setattr(data_access, "client", client)
+    products = {coll: list(client[data_access.MONGO_DB][coll].find({}, {"_id": 0})) for coll in data_access.collections}
+    monkeypatch.setattr(facet_index, "_index", build_facet_index(products))
+    table = asyncio.run(opportunity_table.build_opportunity_table(lambda brand: 1.0, {coll: 1.0 for coll in data_access.collections}))
+    return client[data_access.MONGO_DB], table
+
+
+def rebuilt(db):
+    return build_facet_index({coll: list(db[coll].find({}, {"_id": 0})) for coll in data_access.collections})
+
+
+def test_building_the_table_leaves_facets_alone(catalog):
+    db, _ = catalog
+    assert facet_index._index["counts"] == rebuilt(db)["counts"]
+
+
+def test_changes_reach_the_facet_index(catalog):
+    db, table = catalog
+    before = lookup_facets(facet_index._index, brand="Dell")
+    assert "48 GB" not in before["rams"]
+
+    db["croma"].insert_one({"Brand": "Dell", "RAM": "48 GB", "Storage": "2 TB", "Processor Series": "Core i9", "Processor Type": "Intel", "Price": 250000})
+    doc = db["pai"].find_one({"Brand": "HP"})
+    db["pai"].update_one({"_id": doc["_id"]}, {"$set": {"Processor Type": "Quantum"}})
+    db["flipkart"].delete_one({"_id": db["flipkart"].find_one({})["_id"]})
+    assert asyncio.run(opportunity_table.sync_opportunity_table(table)) == 3
+
+    assert "48 GB" in lookup_facets(facet_index._index, brand="Dell")["rams"]
+    assert "Quantum" in lookup_facets(facet_index._index, brand="HP")["processor_types"]
+    assert facet_index._index["counts"] == rebuilt(db)["counts"]
+    assert facet_index._index["size"] == rebuilt(db)["size"]
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import cache_utils
+import genai_utils
+import price_history
+from benchmarks import FakeGenerativeModel
+from price_history import PriceHistory
+
+SPEC = ("Dell", "16 GB", "512 GB", "Core i5")
+PRICES = {"croma": "60000"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    monkeypatch.setattr(genai_utils.gemini, "retries", 0)
+    monkeypatch.setattr(price_history, "PRICE_HISTORY_PATH", str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(price_history, "_history", None)
+    original = genai_utils.model
+    model = FakeGenerativeModel()
+    genai_utils.set_model(model)
+    yield model
+    genai_utils.set_model(original)
+
+
+def suggest():
+    return asyncio.run(genai_utils.get_llm_price_suggestion_async(*SPEC, PRICES))
+
+
+def test_repeated_inputs_are_served_from_the_cache(model):
+    assert suggest() == FakeGenerativeModel.text
+    # Same inputs up to case and spacing
+    assert genai_utils.get_llm_price_suggestion("dell", "16  GB", "512 gb", "core i5", PRICES) == FakeGenerativeModel.text
+    assert model.calls == 1
+
+
+def test_entries_expire_after_the_ttl(model, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_utils.time, "time", clock)
+    suggest()
+    clock.now += genai_utils.GENAI_CACHE_TTL - 1
+    suggest()
+    assert model.calls == 1
+    clock.now += 2
+    suggest()
+    assert model.calls == 2
+
+
+def test_failures_are_not_cached(model):
+    model.failure_rate = 1.0
+    assert suggest().startswith("⚠️ GenAI Error")
+    model.failure_rate = 0.0
+    assert suggest() == FakeGenerativeModel.text
+    assert model.calls == 2
+
+
+def test_concurrent_identical_requests_share_one_call(model):
+    model.latency = 0.2
+
+    async def burst():
+        return await asyncio.gather(*(genai_utils.get_llm_price_suggestion_async(*SPEC, PRICES) for _ in range(10)))
+
+    assert asyncio.run(burst()) == [FakeGenerativeModel.text] * 10
+    assert model.calls == 1
+    assert not genai_utils._inflight
+
+
+def test_new_price_history_misses_the_cache(model):
+    suggest()
+    writer = PriceHistory(price_history.PRICE_HISTORY_PATH)
+    writer.record("croma", "a", {"Brand": "Dell", "RAM": "16 GB", "Storage": "512 GB", "Processor Series": "Core i5", "Price": 58000})
+    writer.commit()
+    suggest()
+    suggest()
+    assert model.calls == 2
@@ -0,0 +1,59 @@
+import pytest
+import data_access
+import genai_utils
+import local_model
+import similarity_index
+import spec_index
+from benchmarks import FakeGenerativeModel, seeded_client, stub_upstreams
+
+PAYLOAD = {
+    "brand": "Dell", "ram": "16 GB", "storage": "512 GB", "processor_series": "Core i5",
+    "platform_prices": {"reliance": 60000, "croma": "Missing", "flipkart": "Missing"}
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend2
+    monkeypatch.setattr(data_access, "client", seeded_client())
+    for module in (spec_index, similarity_index):
+        monkeypatch.setattr(module, "_index", None)
+    monkeypatch.setattr(local_model, "_model", None)
+    stub_upstreams()
+    return TestClient(backend2.app)
+
+
+def test_suggestions_come_from_the_local_model_by_default(client):
+    model = genai_utils.model
+    body = client.post("/genai_suggestions", json=PAYLOAD).json()
+    assert body["source"] == "local_model"
+    assert [entry["platform"] for entry in body["structured"]] == ["Croma", "Flipkart"]
+    assert all(float(entry["price"].replace(",", "")) > 0 and entry["reason"] for entry in body["structured"])
+    assert model.calls == 0
+
+
+def test_llm_is_an_opt_in_with_the_model_as_fallback(client):
+    body = client.post("/genai_suggestions", json={**PAYLOAD, "llm": True}).json()
+    assert body["source"] == "genai"
+    assert [entry["platform"] for entry in body["local"]] == ["Croma", "Flipkart"]
+
+    genai_utils.set_model(FakeGenerativeModel(failure_rate=1.0))
+    retries, genai_utils.gemini.retries = genai_utils.gemini.retries, 0
+    try:
+        body = client.post("/genai_suggestions", json={**PAYLOAD, "ram": "32 GB", "llm": True}).json()
+    finally:
+        genai_utils.gemini.retries = retries
+        genai_utils.gemini.breaker.record_success()
+    assert body["source"] == "local_model"
+    assert "GenAI Error" in body["genai_error"]
+
+
+def test_observed_prices_anchor_the_prediction(client):
+    client.post("/genai_suggestions", json=PAYLOAD)
+    model = local_model._model
+    args = ("Dell", "16 GB", "512 GB", "Core i5", ["croma"])
+    low = local_model.suggest_locally(model, *args, {"reliance": [40000]})
+    high = local_model.suggest_locally(model, *args, {"reliance": [80000]})
+    price = lambda text: float(text.split("₹")[1].split("\n")[0].replace(",", ""))
+    assert price(high) == pytest.approx(2 * price(low), rel=0.01)
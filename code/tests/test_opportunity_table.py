@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+from pymongo import MongoClient
+import catalog_snapshot
+import data_access
+import opportunity_table
+from benchmarks import seeded_client
+
+PLATFORM_FACTORS = {coll: 1.0 for coll in data_access.collections}
+
+
+def brand_factor(brand):
+    return 1.0
+
+
+def rows(table):
+    return {key: row["business_opportunity"] for key, row in table["rows"].items()}
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    client = seeded_client()
+    products = {coll: list(client[data_access.MONGO_DB][coll].find({}, catalog_snapshot.SNAPSHOT_PROJECTION)) for coll in data_access.collections}
+    catalog_snapshot.export_snapshot(str(tmp_path), products)
+    monkeypatch.setattr(catalog_snapshot, "CATALOG_SNAPSHOT", str(tmp_path))
+    monkeypatch.setattr(catalog_snapshot, "_snapshot", None)
+    monkeypatch.setattr(opportunity_table, "CATALOG_SNAPSHOT", str(tmp_path))
+    monkeypatch.setattr(opportunity_table, "_table", None)
+    # Nothing listens here: every Mongo call fails fast
+    monkeypatch.setattr(data_access, "client", MongoClient("mongodb://127.0.0.1:1/", serverSelectionTimeoutMS=100))
+    return client
+
+
+def test_table_builds_from_the_snapshot_without_mongo(snapshot, monkeypatch):
+    seeded = asyncio.run(opportunity_table.build_opportunity_table(brand_factor, PLATFORM_FACTORS))
+    assert not seeded["synced"]
+
+    monkeypatch.setattr(data_access, "client", snapshot)
+    monkeypatch.setattr(opportunity_table, "CATALOG_SNAPSHOT", "")
+    from_mongo = asyncio.run(opportunity_table.build_opportunity_table(brand_factor, PLATFORM_FACTORS))
+    assert rows(seeded) == rows(from_mongo)
+
+    # The first sync swaps the placeholder ids for the live documents
+    asyncio.run(opportunity_table.sync_opportunity_table(seeded))
+    assert seeded["synced"]
+    assert rows(seeded) == rows(from_mongo)
+    assert {coll: set(docs) for coll, docs in seeded["docs"].items()} == {coll: set(docs) for coll, docs in from_mongo["docs"].items()}
+
+
+def test_backend_starts_without_mongo(snapshot, monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend2
+    monkeypatch.setattr(opportunity_table, "OPPORTUNITY_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(opportunity_table, "OPPORTUNITY_WATCH", "poll")
+
+    with TestClient(backend2.app) as client:
+        response = client.get("/opportunities/top", params={"platform": "croma", "n": 3})
+        assert response.status_code == 200
+        assert len(response.json()["opportunities"]) == 3
+        table = opportunity_table._table
+        assert not table["synced"]
+
+        # Mongo comes up: the next retry reconciles the snapshot-seeded table
+        monkeypatch.setattr(data_access, "client", snapshot)
+        deadline = time.monotonic() + 5
+        while not table["synced"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert table["synced"]
+        task = backend2.app.state.opportunity_watch
+        assert not task.done()
+
+    # Shutdown stops the watcher
+    assert task.cancelled()
+    assert backend2.app.state.opportunity_watch is None
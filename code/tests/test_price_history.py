@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import pytest
+import price_history
+from price_history import PriceHistory, spec_trends
+
+DOC = {"Brand": "Dell", "RAM": "16 GB", "Storage": "512 GB", "Processor Series": "Core i5", "Price": 60000, "MRP": 75000}
+DAY = price_history.DAY
+
+
+@pytest.fixture
+def path(tmp_path, monkeypatch):
+    path = str(tmp_path / "history.sqlite3")
+    monkeypatch.setattr(price_history, "PRICE_HISTORY_PATH", path)
+    monkeypatch.setattr(price_history, "_history", None)
+    return path
+
+
+def test_reads_do_not_create_the_database(path):
+    assert spec_trends("Dell", "16 GB", "512 GB", "Core i5") == {}
+    assert os.listdir(os.path.dirname(path)) == []
+
+
+def test_reader_sees_ingested_history_read_only(path):
+    writer = PriceHistory(path)
+    writer.record("croma", "a", DOC, observed_at=0)
+    writer.record("croma", "a", {**DOC, "Price": 54000}, observed_at=10 * DAY)
+    writer.commit()
+
+    trends = spec_trends("Dell", "16 GB", "512 GB", "Core i5")
+    assert trends["croma"]["observations"] == 2
+    assert trends["croma"]["window_min"] == 54000 and trends["croma"]["window_max"] == 60000
+
+    with pytest.raises(sqlite3.OperationalError):
+        price_history.get_price_history()._conn.execute("DELETE FROM observations")
+
+    # A later ingest commit is picked up by the open reader
+    writer.record("pai", "b", DOC, observed_at=11 * DAY)
+    writer.commit()
+    assert set(spec_trends("Dell", "16 GB", "512 GB", "Core i5")) == {"croma", "pai"}
+
+
+def test_unchanged_prices_are_not_appended(path):
+    history = PriceHistory(path)
+    assert history.record("croma", "a", DOC, observed_at=0)
+    assert not history.record("croma", "a", DOC, observed_at=DAY)
+    assert not history.record("croma", "a", {**DOC, "Price": 1}, observed_at=-DAY)
+    history.commit()
+    assert history.stats() == {"observations": 1, "listings": 1}
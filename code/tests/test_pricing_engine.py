@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from pricing_engine import explain_spec, suggest_prices
+
+PLATFORMS = ["reliance", "pai", "croma", "flipkart"]
+FACTORS = {"reliance": 1.0, "pai": 1.0, "croma": 1.02, "flipkart": 0.98}
+SPECS = [{"reliance": [60000.0], "pai": [62000.0, 64000.0], "croma": []}]
+TRENDS = [{"reliance": {"ewma": 56000.0}, "pai": {"ewma": 65000.0}}]
+
+
+def test_trends_leave_prices_alone_by_default():
+    plain = suggest_prices(SPECS, [1.0], PLATFORMS, FACTORS)
+    with_trends = suggest_prices(SPECS, [1.0], PLATFORMS, FACTORS, TRENDS)
+    assert np.array_equal(plain["suggested"], with_trends["suggested"], equal_nan=True)
+    _, breakdown = explain_spec(with_trends, 0, True, TRENDS[0])
+    assert "trend_weight" not in breakdown["flipkart"]
+    assert set(breakdown["flipkart"]["market_trends"]) == {"reliance", "pai"}
+
+
+def test_trend_weight_blends_the_reference_prices():
+    result = suggest_prices(SPECS, [1.0], PLATFORMS, FACTORS, TRENDS, trend_weight=0.5)
+    suggested, breakdown = explain_spec(result, 0, True, TRENDS[0])
+    reliance = 0.5 * 60000 + 0.5 * 56000
+    pai = 0.5 * 63000 + 0.5 * 65000
+    assert breakdown["flipkart"]["avg_price"] == pytest.approx((reliance + pai) / 2)
+    assert suggested["flipkart"] == pytest.approx((reliance + pai) / 2 * 0.98)
+    assert breakdown["flipkart"]["trend_weight"] == 0.5
+    assert "EWMA trend" in breakdown["flipkart"]["strategy"]
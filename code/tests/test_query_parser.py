@@ -0,0 +1,42 @@
+import pytest
+from query_parser import build_query_parser, parse_query
+
+PARSER = build_query_parser(["Dell", "HP", "Lenovo", "Apple"], ["Core i5", "Core i7", "Ryzen 5", "Apple M3 Pro"])
+
+
+def parse(query):
+    found = parse_query(PARSER, query)
+    return found["ram"], found["storage"]
+
+
+@pytest.mark.parametrize("query, ram, storage", [
+    ("256GB SSD 16GB RAM", "16gb", "256gb"),
+    ("dell 1TB", None, "1tb"),
+    ("hp 8 GB", "8gb", None),
+    ("16gb 1tb", "16gb", "1tb"),
+    ("1tb 16gb", "16gb", "1tb"),
+    ("512 gb 8gb", "8gb", "512gb"),
+    # Without a hint 64 GB would be read as RAM
+    ("64gb ssd 4gb ram", "4gb", "64gb"),
+    ("128gb ram", "128gb", None),
+    ("8gb memory and 256 gb storage", "8gb", "256gb"),
+    ("16gb ramp", "16gb", None)
+])
+def test_sizes_are_split_into_ram_and_storage(query, ram, storage):
+    assert parse(query) == (ram, storage)
+
+
+def test_first_mention_wins():
+    assert parse("16gb or 32gb with 512gb or 1tb") == ("16gb", "512gb")
+
+
+def test_processor_boundaries():
+    assert parse_query(PARSER, "dell i35 laptop")["processor"] is None
+    assert parse_query(PARSER, "dell core i5 16gb")["processor"] == "i5"
+    assert parse_query(PARSER, "lenovo ryzen 5 on croma") == {
+        "brand": "lenovo", "ram": None, "storage": None, "processor": "ryzen5", "platform": "croma"
+    }
+    # "m3 pro" maps to the catalog's series and leaves the brand to match on its own
+    assert parse_query(PARSER, "apple m3 pro 18gb") == {
+        "brand": "apple", "ram": "18gb", "storage": None, "processor": "applem3pro", "platform": None
+    }
@@ -0,0 +1,80 @@
+import random
+from genai_utils import SuggestionParser, parse_suggestions
+
+
+def old_parse(text):
+    # The /genai_suggestions parsing loop SuggestionParser replaced
+    structured_response = []
+    strategy_notes = ""
+    lines = text.strip().split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith("📌"):
+            parts = line.split("→")
+            if len(parts) >= 2:
+                price_line = f"{parts[0].replace('📌', '').strip()} → ₹{parts[1].strip()}"
+                reason = ""
+                i += 1
+                while i < len(lines) and not lines[i].strip().startswith("📌"):
+                    reason += lines[i].strip() + " "
+                    i += 1
+                structured_response.append({
+                    "platform": parts[0].replace("📌", "").strip(),
+                    "price": parts[1].strip().replace("₹", ""),
+                    "reason": reason.strip(),
+                    "formatted": f"📌 {price_line}\n{reason.strip()}"
+                })
+            else:
+                i += 1
+        else:
+            if any(keyword in line.lower() for keyword in ["logic", "strategy", "how", "pricing"]):
+                strategy_notes += line + "\n"
+            i += 1
+    return structured_response, strategy_notes.strip()
+
+
+LINES = [
+    "📌 Flipkart → ₹57,000", "📌 Croma → ₹59,000 (premium placement)", "📌 Pai → ", "📌 Reliance",
+    "📌Flipkart→₹1,20,000 → extra", "Reason: Based on average pricing of similar products.",
+    "Reason: Higher due to premium platform and product visibility...", "", "   ",
+    "Pricing strategy: average of listed platforms.", "How we priced it: brand tier.", "Some other line",
+    "  indented logic note  "
+]
+
+
+def random_text(rng):
+    return "\n".join(rng.choice(LINES) for _ in range(rng.randint(0, 14)))
+
+
+def feed_in_chunks(text, rng):
+    parser = SuggestionParser()
+    blocks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 12)
+        blocks += parser.feed(text[i:i + size])
+        i += size
+    return blocks + parser.close(), parser.strategy_notes.strip()
+
+
+def test_parse_suggestions_matches_old_loop():
+    rng = random.Random(17)
+    for _ in range(2000):
+        text = random_text(rng)
+        assert parse_suggestions(text) == old_parse(text), text
+
+
+def test_chunked_feed_matches_whole_text():
+    rng = random.Random(23)
+    for _ in range(2000):
+        text = random_text(rng)
+        assert feed_in_chunks(text, rng) == old_parse(text), text
+
+
+def test_block_is_emitted_when_the_next_one_starts():
+    parser = SuggestionParser()
+    assert parser.feed("📌 Flipkart → ₹57,000\nReason: cheaper\n") == []
+    blocks = parser.feed("📌 Croma → ₹59,000\n")
+    assert [block["platform"] for block in blocks] == ["Flipkart"]
+    assert blocks[0]["price"] == "57,000"
+    assert [block["platform"] for block in parser.close()] == ["Croma"]
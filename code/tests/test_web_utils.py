@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+import cache_utils
+import web_utils
+from benchmarks import FakeGoogleSearch, UpstreamError, stub_upstreams
+
+SPEC = {"brand": "Dell", "ram": "16GB", "storage": "512GB", "processor": "i5"}
+QUERY = "Dell 16GB 512GB i5 laptop"
+MATCH = [{"title": "Dell Inspiron 15 (16GB RAM, 512GB SSD, Core i5)", "snippet": ""}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingSearch(FakeGoogleSearch):
+    results = []
+    fail = False
+    calls = 0
+
+    def get_dict(self):
+        CountingSearch.calls += 1
+        if self.fail:
+            raise UpstreamError("injected SerpAPI failure")
+        return {"organic_results": self.results}
+
+
+@pytest.fixture
+def search(monkeypatch):
+    stub_upstreams()
+    monkeypatch.setattr(web_utils, "GoogleSearch", CountingSearch)
+    monkeypatch.setattr(web_utils.serpapi, "retries", 0)
+    monkeypatch.setattr(CountingSearch, "calls", 0)
+    clock = Clock()
+    monkeypatch.setattr(cache_utils.time, "time", clock)
+    yield clock
+    web_utils.web_cache.clear()
+
+
+def test_repeated_queries_make_no_call(search, monkeypatch):
+    monkeypatch.setattr(CountingSearch, "results", MATCH)
+    assert web_utils.search_product_on_web(QUERY, **SPEC) is True
+    assert web_utils.search_product_on_web(QUERY.lower(), **SPEC) is True
+    assert asyncio.run(web_utils.search_product_on_web_async(QUERY, **SPEC)) is True
+    assert CountingSearch.calls == 1
+
+    # From disk once the in-process tier is gone
+    web_utils.web_cache.memory.clear()
+    assert web_utils.search_product_on_web(QUERY, **SPEC) is True
+    assert CountingSearch.calls == 1
+
+
+def test_found_results_live_for_the_positive_ttl(search, monkeypatch):
+    monkeypatch.setattr(CountingSearch, "results", MATCH)
+    web_utils.search_product_on_web(QUERY, **SPEC)
+    search.now += web_utils.WEB_CACHE_TTL - 1
+    web_utils.search_product_on_web(QUERY, **SPEC)
+    assert CountingSearch.calls == 1
+    search.now += 2
+    web_utils.search_product_on_web(QUERY, **SPEC)
+    assert CountingSearch.calls == 2
+
+
+def test_not_found_results_expire_sooner(search):
+    assert asyncio.run(web_utils.search_product_on_web_async(QUERY, **SPEC)) is False
+    search.now += web_utils.WEB_CACHE_NEGATIVE_TTL - 1
+    assert asyncio.run(web_utils.search_product_on_web_async(QUERY, **SPEC)) is False
+    assert CountingSearch.calls == 1
+    search.now += 2
+    asyncio.run(web_utils.search_product_on_web_async(QUERY, **SPEC))
+    assert CountingSearch.calls == 2
+
+
+def test_failures_are_not_cached(search, monkeypatch):
+    monkeypatch.setattr(CountingSearch, "fail", True)
+    assert web_utils.search_product_on_web(QUERY, **SPEC) is False
+    monkeypatch.setattr(CountingSearch, "fail", False)
+    monkeypatch.setattr(CountingSearch, "results", MATCH)
+    assert web_utils.search_product_on_web(QUERY, **SPEC) is True
+    assert CountingSearch.calls == 2
@@ -2,18 +2,53 @@ import streamlit as st
 import requests
 import pandas as pd
 import base64
+import io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 st.set_page_config(page_title="Price Suggestion System with Chatbot", layout="wide")
 
+# ⏱️ Seconds before giving up on a backend call
+FILTERS_TIMEOUT = 5
+SEARCH_TIMEOUT = 30
+CHATBOT_TIMEOUT = 30
+GENAI_TIMEOUT = 60
+
+# 🖼️ Assets are resized and re-encoded once per server process, not on every rerun
+@st.cache_resource
+def encode_image(image_file, max_width, quality=80):
+    image = Image.open(image_file)
+    image.thumbnail((max_width, max_width * 4))
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+# 🔌 One pooled session shared by every rerun and user
+@st.cache_resource
+def http_session():
+    session = requests.Session()
+    # Only idempotent GETs are retried; connection errors fail fast
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# 🧵 GenAI suggestions run here while the product tables render
+@st.cache_resource
+def genai_executor():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="genai")
+
 # 🎨 Set background image with dark overlay
 def set_background_local(image_file):
-    with open(image_file, "rb") as image:
-        encoded = base64.b64encode(image.read()).decode()
+    encoded = encode_image(image_file, 1920, quality=70)
     st.markdown(
         f"""
         <style>
         .stApp {{
-            background-image: url("data:image/jpg;base64,{encoded}");
+            background-image: url("data:image/jpeg;base64,{encoded}");
             background-size: cover;
             background-position: center;
             background-attachment: fixed;
@@ -38,6 +73,11 @@ def set_background_local(image_file):
 BASE_URL = "http://127.0.0.1:8002"
 CHATBOT_URL = "http://127.0.0.1:8001"
 
+@st.cache_data(ttl=300, show_spinner=False)
+def ask_chatbot(query):
+    response = http_session().post(f"{CHATBOT_URL}/chatbot", json={"query": query}, timeout=CHATBOT_TIMEOUT)
+    return response.status_code, response.json() if response.status_code == 200 else {}
+
 # 💬 Sidebar Chatbot
 with st.sidebar:
     st.header("💬 Chat with PriceBot")
@@ -49,38 +89,128 @@ with st.sidebar:
     """)
     user_query = st.text_input("Ask a price-related question:")
     if user_query:
+        # Cached so other widgets' reruns do not re-send the same question
         with st.spinner("Thinking..."):
             try:
-                response = requests.post(f"{CHATBOT_URL}/chatbot", json={"query": user_query})
-                if response.status_code == 200:
-                    result = response.json()
+                status, result = ask_chatbot(user_query)
+                if status == 200:
                     st.success(result.get("response", "✅ Response received but no data returned."))
                 else:
-                    st.error(f"❌ Chatbot backend error: {response.status_code}")
+                    st.error(f"❌ Chatbot backend error: {status}")
             except Exception as e:
                 st.error(f"❌ Chatbot error: {e}")
 
 # 📊 Main UI - SPI.ai Logo & Heading (Enlarged)
 st.markdown("""
 <div style="display: flex; align-items: center; gap: 0.75rem; margin-top: 10px;">
-    <img src="data:image/png;base64,""" + base64.b64encode(open("logo.jpeg", "rb").read()).decode() + """" width="70"/>
+    <img src="data:image/jpeg;base64,""" + encode_image("logo.jpeg", 140) + """" width="70"/>
     <h1 style="color: white; font-size: 48px; font-weight: 800; margin: 0;">SPI.ai</h1>
 </div>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def get_filters(brand=None, ram=None, storage=None):
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_filters(brand=None, ram=None, storage=None):
     params = {}
     if brand: params["brand"] = brand
     if ram: params["ram"] = ram
     if storage: params["storage"] = storage
+    response = http_session().get(f"{BASE_URL}/get_filters", params=params, timeout=FILTERS_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def get_filters(brand=None, ram=None, storage=None):
+    # Failures are reported but not cached, so the next rerun tries again
     try:
-        response = requests.get(f"{BASE_URL}/get_filters", params=params)
-        return response.json()
+        return fetch_filters(brand, ram, storage)
     except Exception as e:
         st.error(f"❌ Failed to load filters: {e}")
         return {"brands": [], "rams": [], "storages": [], "processor_series": []}
 
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_pricing_factors():
+    response = http_session().get(f"{BASE_URL}/pricing_factors", timeout=FILTERS_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def get_pricing_factors():
+    try:
+        return fetch_pricing_factors()
+    except Exception as e:
+        st.warning(f"⚠️ Could not load pricing factors: {e}")
+        return None
+
+@st.cache_data(ttl=300, show_spinner=False)
+def search_products(brand, ram, storage, processor_series, genai=False):
+    # One round trip with the local model suggestions; with genai the backend
+    # also starts the GenAI suggestion and returns a job handle
+    params = {
+        "brand": brand,
+        "ram": ram,
+        "storage": storage,
+        "processor_series": processor_series,
+        "genai": "true" if genai else "false"
+    }
+    response = http_session().get(f"{BASE_URL}/search", params=params, timeout=SEARCH_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def wait_genai_job(poll_url, payload):
+    # Runs on the executor: no st.* calls in here. Jobs live in the worker that
+    # started them, so under serve.py the poll may land elsewhere and 404
+    response = http_session().get(f"{BASE_URL}{poll_url}", params={"wait": GENAI_TIMEOUT}, timeout=GENAI_TIMEOUT + 5)
+    if response.status_code == 404:
+        return fetch_genai_suggestions(payload)
+    response.raise_for_status()
+    result = response.json()
+    if result["status"] != "done":
+        raise RuntimeError(result.get("detail", f"GenAI suggestion is still {result['status']}"))
+    return result
+
+def fetch_genai_suggestions(payload):
+    response = http_session().post(f"{BASE_URL}/genai_suggestions", json=payload, timeout=GENAI_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def genai_future(data):
+    # Waits on the job /search started, once per session; later reruns
+    # (downloads, chatbot) reuse the future. If the job failed or expired,
+    # the next rerun asks /genai_suggestions directly instead
+    spec = data["spec"]
+    key = tuple(spec.values())
+    futures = st.session_state.setdefault("genai_futures", {})
+    payload = {**spec, "platform_prices": {platform: "Missing" for platform in data["missing_platforms"]}, "llm": True}
+    if key not in futures and data.get("genai"):
+        futures[key] = genai_executor().submit(wait_genai_job, data["genai"]["poll_url"], payload)
+    elif key not in futures or futures[key].done() and futures[key].exception() is not None:
+        futures[key] = genai_executor().submit(fetch_genai_suggestions, payload)
+    return futures[key]
+
+def render_suggestion(entry):
+    with st.container():
+        st.markdown(f"### 🔗 {entry['platform'].capitalize()}")
+        st.markdown(f"💰 **Suggested Price:** ₹{entry['price']}")
+        if entry.get("reason"):
+            st.markdown("📝 **Why this price?**")
+            st.markdown(
+                f"""
+                <div style="
+                    background-color: #111;
+                    border-left: 5px solid #ff4b4b;
+                    color: white;
+                    padding: 1rem;
+                    margin-top: 0.5rem;
+                    border-radius: 10px;
+                    box-shadow: 0 4px 10px rgba(255,255,255,0.1);
+                    font-size: 16px;
+                ">
+                <strong>Reason:</strong> {entry['reason']}
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+        else:
+            st.warning("⚠️ No reasoning was provided by the model.")
+
 # -- Dropdowns --
 filters = get_filters()
 brand_options = filters["brands"] + ["Other"]
@@ -103,39 +233,47 @@ selected_processor = st.selectbox("Select Processor", processor_options)
 processor_series = st.text_input("Enter Processor") if selected_processor == "Other" else selected_processor
 
 # -- Submit --
+# The last search stays on the page across reruns (downloads, chatbot questions)
+# Gemini is an opt-in refinement of the local model's suggestions
+use_genai = st.checkbox("🤖 Also ask GenAI for price suggestions (slower)", value=False)
 if st.button("Search Products") and processor_series:
-    params = {
-        "brand": brand,
-        "ram": ram,
-        "storage": storage,
-        "processor_series": processor_series
-    }
+    st.session_state["search"] = (brand, ram, storage, processor_series, use_genai)
+
+if "search" in st.session_state:
+    brand, ram, storage, processor_series, use_genai = st.session_state["search"]
 
     with st.spinner("⏳ Searching products and validating online availability..."):
         try:
-            response = requests.get(f"{BASE_URL}/search_products", params=params)
-            data = response.json()
+            data = search_products(brand, ram, storage, processor_series, use_genai)
         except Exception as e:
             st.error(f"❌ Failed to fetch search results: {e}")
             st.stop()
 
+    missing_platforms = data.get("missing_platforms", [])
+    found_in_db = data.get("found_in_db", False)
+    found_on_web = data.get("web_result_found", False)
+    # Polled in the background; the tables below do not wait for it
+    genai = genai_future(data) if data.get("genai") else None
+
     # -- Display Results --
     st.subheader("📦 Available Products")
-    for platform, products in data["exact_matches"].items():
-        if isinstance(products, list) and len(products) > 0:
-            df = pd.DataFrame(products)
+    for platform, result in data["platforms"].items():
+        if result["available"]:
+            df = pd.DataFrame(result["products"])
             st.write(f"## {platform.capitalize()}")
             st.dataframe(df)
         else:
             st.write(f"**{platform.capitalize()}** - ❌ Not Available")
 
     st.subheader("🔍 Similar Products (Other Brands)")
-    for platform, products in data.get("cross_brand_similar_products", {}).items():
+    for platform, result in data["platforms"].items():
+        products = result.get("similar", [])
         if products:
             df_similar = pd.DataFrame(products)
             if not df_similar.empty:
-                st.markdown(f"### 📦 {platform.capitalize()}")
-                st.dataframe(df_similar, use_container_width=True)
+                # Collapsed by default to keep the first paint light
+                with st.expander(f"📦 {platform.capitalize()} ({len(df_similar)})"):
+                    st.dataframe(df_similar, use_container_width=True)
                 csv = df_similar.to_csv(index=False).encode("utf-8")
                 st.download_button(
                     label=f"⬇️ Download {platform}_similar_products.csv",
@@ -145,15 +283,6 @@ if st.button("Search Products") and processor_series:
                 )
 
     # -- Business Opportunity --
-    missing_platforms = data.get("missing_platforms", [])
-    found_in_db = any(
-        isinstance(data["exact_matches"].get(p), list) and len(data["exact_matches"].get(p)) > 0
-        for p in ["reliance", "flipkart", "croma", "pai"]
-    )
-    found_on_web = any(
-        explanation.get("web_result_found") is True
-        for explanation in data.get("pricing_explanation", {}).values()
-    )
     all_web_invalid = not found_in_db and not found_on_web
 
     if all_web_invalid:
@@ -172,9 +301,8 @@ if st.button("Search Products") and processor_series:
         st.info("✅ Product is available on all platforms. No business opportunity or GenAI suggestion needed.")
     else:
         st.subheader("💡 Business Opportunities")
-        pricing_explanation = data.get("pricing_explanation", {})
-        for platform, price in data["business_opportunity"].items():
-            explanation = pricing_explanation.get(platform, {})
+        for platform in missing_platforms:
+            price = data["platforms"][platform].get("suggestion", {}).get("price")
             if isinstance(price, (int, float)):
                 st.markdown(
                     f"""
@@ -184,7 +312,7 @@ if st.button("Search Products") and processor_series:
                     """,
                     unsafe_allow_html=True
                 )
-            elif explanation.get("web_result_found") is True:
+            else:
                 st.info(f"🔗 **{platform.capitalize()}** → ✅ This product exists online, but we have no pricing data.")
 
         with st.expander("📘 How Business Opportunity Prices are Calculated"):
@@ -195,59 +323,39 @@ if st.button("Search Products") and processor_series:
             ```
             suggested_price = average_price × brand_factor × platform_factor
             ```
-            - **Brand Factor:**
-                - Premium: 1.05
-                - Mid: 1.00
-                - Budget: 0.95
-            - **Platform Factor:**
-                - Croma: 1.10
-                - Flipkart: 1.05
-                - Pai: 1.03
-                - Reliance: 1.00
             """)
+            # The factors the backend is using right now
+            factors = get_pricing_factors()
+            if factors:
+                brand_lines = "\n".join(f"    - {tier.capitalize()}: {value:.2f}" for tier, value in sorted(factors["brand_factors"].items(), key=lambda item: -item[1]))
+                platform_lines = "\n".join(f"    - {platform.capitalize()}: {value:.2f}" for platform, value in sorted(factors["platform_factors"].items(), key=lambda item: -item[1]))
+                st.markdown(f"- **Brand Factor:**\n{brand_lines}\n- **Platform Factor:**\n{platform_lines}")
+                if factors.get("fitted_at"):
+                    st.caption(f"Factors v{factors['version']}, fitted {factors['fitted_at']}")
 
-        full_platform_prices = {platform: "Missing" for platform in missing_platforms}
-        genai_payload = {
-            "brand": brand,
-            "ram": ram,
-            "storage": storage,
-            "processor_series": processor_series,
-            "platform_prices": full_platform_prices
-        }
+        # Local model suggestions come with the search results; GenAI refines them
+        if data.get("local_suggestions"):
+            st.subheader("⚡ Suggested Prices")
+            for entry in data["local_suggestions"]:
+                if entry["platform"].lower() in missing_platforms:
+                    render_suggestion(entry)
 
-        try:
-            with st.spinner("🤖 Thinking... Generating suggestions using GenAI..."):
-                genai_response = requests.post(f"{BASE_URL}/genai_suggestions", json=genai_payload).json()
-
-            st.subheader("🤖 GenAI Price Suggestion")
-            if "structured" in genai_response and genai_response["structured"]:
-                for entry in genai_response["structured"]:
-                    if entry["platform"].lower() in missing_platforms:
-                        with st.container():
-                            st.markdown(f"### 🔗 {entry['platform'].capitalize()}")
-                            st.markdown(f"💰 **Suggested Price:** ₹{entry['price']}")
-                            if entry.get("reason"):
-                                st.markdown("📝 **Why this price?**")
-                                st.markdown(
-                                    f"""
-                                    <div style="
-                                        background-color: #111;
-                                        border-left: 5px solid #ff4b4b;
-                                        color: white;
-                                        padding: 1rem;
-                                        margin-top: 0.5rem;
-                                        border-radius: 10px;
-                                        box-shadow: 0 4px 10px rgba(255,255,255,0.1);
-                                        font-size: 16px;
-                                    ">
-                                    <strong>Reason:</strong> {entry['reason']}
-                                    </div>
-                                    """,
-                                    unsafe_allow_html=True
-                                )
-                            else:
-                                st.warning("⚠️ No reasoning was provided by the model.")
-            else:
-                st.warning("⚠️ GenAI Error: No response.")
-        except Exception as e:
-            st.error(f"❌ GenAI call failed: {e}")
+        if use_genai:
+            try:
+                if genai is None:
+                    genai = genai_future(data)
+                with st.spinner("🤖 Thinking... Generating suggestions using GenAI..."):
+                    genai_response = genai.result(timeout=GENAI_TIMEOUT)
+
+                if genai_response.get("source") == "local_model":
+                    # Gemini failed; the model suggestions above stand
+                    st.warning(genai_response.get("genai_error", "⚠️ GenAI Error: No response."))
+                elif "structured" in genai_response and genai_response["structured"]:
+                    st.subheader("🤖 GenAI Price Suggestion")
+                    for entry in genai_response["structured"]:
+                        if entry["platform"].lower() in missing_platforms:
+                            render_suggestion(entry)
+                else:
+                    st.warning("⚠️ GenAI Error: No response.")
+            except Exception as e:
+                st.error(f"❌ GenAI call failed: {e}")
@@ -1,18 +1,90 @@
 import re
 import os
+import json
 from serpapi import GoogleSearch
 from dotenv import load_dotenv
+from cache_utils import MISSING, LRUCache, SQLiteCache, TieredCache
+from metrics import span
+from external_calls import ExternalService
 
 load_dotenv()
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 
+# Web validation cache: in-process LRU backed by SQLite, negative results expire sooner
+WEB_CACHE_TTL = int(os.getenv("WEB_CACHE_TTL", "86400"))
+WEB_CACHE_NEGATIVE_TTL = int(os.getenv("WEB_CACHE_NEGATIVE_TTL", "3600"))
+WEB_CACHE_PATH = os.getenv("WEB_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "web_cache.sqlite3"))
+WEB_CACHE_MAX_ENTRIES = int(os.getenv("WEB_CACHE_MAX_ENTRIES", "10000"))
+
+web_cache = TieredCache(
+    LRUCache(maxsize=1024, ttl=WEB_CACHE_TTL),
+    SQLiteCache(WEB_CACHE_PATH, max_entries=WEB_CACHE_MAX_ENTRIES, ttl=WEB_CACHE_TTL) if WEB_CACHE_PATH else None
+)
+
+# SerpAPI calls: bounded pool, per-call timeout, retries and a circuit breaker
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "10"))
+serpapi = ExternalService(
+    "serpapi",
+    max_concurrency=int(os.getenv("SERPAPI_MAX_CONCURRENCY", "8")),
+    timeout=SERPAPI_TIMEOUT,
+    retries=int(os.getenv("SERPAPI_RETRIES", "2"))
+)
+
 def normalize(text):
     return re.sub(r"[^a-zA-Z0-9 ]", "", text).lower().strip()
 
-def search_product_on_web(query, num_results=5, brand=None, ram=None, storage=None, processor=None):
+def web_cache_key(query, num_results, brand, ram, storage, processor):
+    return json.dumps([
+        normalize(query), num_results,
+        normalize(brand or ""), normalize(ram or ""), normalize(storage or ""), normalize(processor or "")
+    ])
+
+def get_web_cache_stats():
+    return {**web_cache.stats(), "serpapi": serpapi.stats()}
+
+def _cached_result(query, num_results, brand, ram, storage, processor):
     if not SERPAPI_KEY:
         raise ValueError("SERPAPI_KEY not found in environment variables")
 
+    key = web_cache_key(query, num_results, brand, ram, storage, processor)
+    with span("web_search.cache"):
+        return key, web_cache.get(key)
+
+def _store_result(key, found):
+    web_cache.set(key, found, ttl=None if found else WEB_CACHE_NEGATIVE_TTL)
+    return found
+
+def search_product_on_web(query, num_results=5, brand=None, ram=None, storage=None, processor=None):
+    key, cached = _cached_result(query, num_results, brand, ram, storage, processor)
+    if cached is not MISSING:
+        return cached
+
+    try:
+        with span("web_search.serpapi"):
+            results = serpapi.call_sync(_fetch_results, query, num_results)
+    except Exception as e:
+        # Failures (including an open circuit) are not cached so a later request retries SerpAPI
+        print("❌ Web search failed:", e)
+        return False
+
+    return _store_result(key, _match_results(results, brand, ram, storage, processor))
+
+async def search_product_on_web_async(query, num_results=5, brand=None, ram=None, storage=None, processor=None):
+    # Same as search_product_on_web, awaiting SerpAPI instead of holding a thread
+    key, cached = _cached_result(query, num_results, brand, ram, storage, processor)
+    if cached is not MISSING:
+        return cached
+
+    try:
+        with span("web_search.serpapi"):
+            results = await serpapi.call(_fetch_results, query, num_results)
+    except Exception as e:
+        print("❌ Web search failed:", e)
+        return False
+
+    return _store_result(key, _match_results(results, brand, ram, storage, processor))
+
+def _fetch_results(query, num_results):
     params = {
         "engine": "google",
         "q": query,
@@ -20,24 +92,23 @@ def search_product_on_web(query, num_results=5, brand=None, ram=None, storage=No
         "num": num_results
     }
 
-    try:
-        search = GoogleSearch(params)
-        results = search.get_dict().get("organic_results", [])
-
-        # Normalize target inputs
-        norm_brand = normalize(brand or "")
-        norm_ram = normalize(ram or "").replace("gb", "")
-        norm_storage = normalize(storage or "").replace("gb", "").replace("tb", "")
-        norm_proc = normalize(processor or "")
-
-        for result in results:
-            text = normalize(result.get("title", "") + " " + result.get("snippet", ""))
-            if (norm_brand in text and
-                (norm_ram in text or ram in text) and
-                (norm_storage in text or storage in text) and
-                norm_proc in text):
-                return True
-        return False
-    except Exception as e:
-        print("❌ Web search failed:", e)
-        return False
+    search = GoogleSearch(params)
+    # The client passes this straight to requests as the HTTP timeout
+    search.timeout = SERPAPI_TIMEOUT
+    return search.get_dict().get("organic_results", [])
+
+def _match_results(results, brand, ram, storage, processor):
+    # Normalize target inputs
+    norm_brand = normalize(brand or "")
+    norm_ram = normalize(ram or "").replace("gb", "")
+    norm_storage = normalize(storage or "").replace("gb", "").replace("tb", "")
+    norm_proc = normalize(processor or "")
+
+    for result in results:
+        text = normalize(result.get("title", "") + " " + result.get("snippet", ""))
+        if (norm_brand in text and
+            (norm_ram in text or ram in text) and
+            (norm_storage in text or storage in text) and
+            norm_proc in text):
+            return True
+    return False